@@ -0,0 +1,50 @@
+"""Benchmark collecting large outputs.
+
+Run with ``python bench/output.py``.  The time per megabyte should stay
+flat as the output grows.
+
+"""
+import time
+
+from reel._output import Output
+
+CHUNK = b'x' * 65536
+SIZES_MB = [16, 64, 256, 512]
+
+
+def collect_output(size_mb):
+    """Return seconds spent collecting `size_mb` megabytes."""
+    output = Output()
+    chunks = size_mb * 1024**2 // len(CHUNK)
+    start = time.perf_counter()
+    for _ in range(chunks):
+        output.write(CHUNK)
+    with output.getbuffer() as view:
+        assert len(view) == size_mb * 1024**2
+    return time.perf_counter() - start
+
+
+def concatenate_bytes(size_mb):
+    """Return seconds spent collecting the old way."""
+    output = b''
+    chunks = size_mb * 1024**2 // len(CHUNK)
+    start = time.perf_counter()
+    for _ in range(chunks):
+        output += CHUNK
+    return time.perf_counter() - start
+
+
+def main():
+    """Print the cost per megabyte at each size."""
+    print(f'{"MB":>6} {"Output ms/MB":>14} {"bytes += ms/MB":>16}')
+    for size_mb in SIZES_MB:
+        linear = collect_output(size_mb) * 1000 / size_mb
+        if size_mb <= 64:
+            quadratic = f'{concatenate_bytes(size_mb) * 1000 / size_mb:16.3f}'
+        else:
+            quadratic = f'{"(skipped)":>16}'
+        print(f'{size_mb:6d} {linear:14.3f} {quadratic}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Benchmark launching spools with fork and with posix_spawn.
+
+Run with ``python bench/spawn.py``.  With the spawn launcher the time
+per launch should stay flat as this process grows, where fork slows
+down with every page table it copies.  Python before 3.8 always forks.
+
+"""
+import subprocess
+import time
+
+import trio
+
+from reel import Spool
+
+LAUNCHES = 200
+SIZES_MB = [0, 256, 1024]
+
+
+async def launch(launcher, count):
+    """Return milliseconds per launch of a trivial command."""
+    start = time.perf_counter()
+    for _ in range(count):
+        spool = Spool('true').launcher(launcher)
+        async with trio.open_nursery() as nursery:
+            spool.start(nursery)
+            await spool.proc.wait()
+        await spool.aclose()
+    return (time.perf_counter() - start) * 1000 / count
+
+
+def main():
+    """Print the cost of a launch at each process size."""
+    posix_spawn = getattr(subprocess, '_USE_POSIX_SPAWN', False)
+    print(f'posix_spawn available: {posix_spawn}')
+    print(f'{"RSS+MB":>6} {"fork ms":>10} {"spawn ms":>10}')
+    ballast = []
+    for size_mb in SIZES_MB:
+        # Touch every page so the memory is really mapped.
+        ballast = bytearray(size_mb * 1024**2)
+        for offset in range(0, len(ballast), 4096):
+            ballast[offset] = 1
+        fork = trio.run(launch, 'fork', LAUNCHES)
+        spawn = trio.run(launch, 'spawn', LAUNCHES)
+        print(f'{size_mb:6d} {fork:10.3f} {spawn:10.3f}')
+    del ballast
+
+
+if __name__ == '__main__':
+    main()
@@ -4,10 +4,19 @@ __version__ = _pkg.get_distribution(__name__).version
 
 from . import cmd
 from . import config
+from . import dsp
+from ._cache import PCMCache
+from ._chunk import ChunkSize
 from ._daemon import Daemon
+from ._framer import Framer
+from ._loudness import Loudness
+from ._mixer import Mixer, MixSettings
+from ._pacer import Pacer
+from ._queue import PlayQueue
 from ._reel import Reel
 from ._server import Server
 from ._spool import Spool
 from ._streamer import Streamer
+from ._tee import Tee
 from ._track import Track
 from ._transport import Transport
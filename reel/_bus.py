@@ -0,0 +1,156 @@
+"""Announcer, Bus and Subscription classes."""
+import inspect
+import logging
+
+import trio
+
+from ._channel import open_channel
+
+LOG = logging.getLogger(__name__)
+
+BUS_POLICIES = ('coalesce', 'drop_oldest', 'drop_newest')
+
+
+class Subscription:
+    """One subscriber of a bus, with a queue and a task of its own."""
+
+    def __init__(self, callback, max_events, policy):
+        """Queue up to `max_events` events for `callback`."""
+        if policy not in BUS_POLICIES:
+            raise ValueError(f'unknown bus policy {policy!r}')
+        if policy == 'coalesce':
+            max_events, policy = 1, 'drop_oldest'
+        self.callback = callback
+        self.cancel_scope = trio.CancelScope()
+        self.send_ch, self._receive_ch = open_channel(
+            max_events, policy=policy
+        )
+        self.started = False
+
+    @property
+    def dropped(self):
+        """Return how many events were thrown away."""
+        return self.send_ch.dropped
+
+    async def run(self):
+        """Call the subscriber with each event until the bus closes."""
+        with self.cancel_scope:
+            async with self._receive_ch:
+                async for event in self._receive_ch:
+                    try:
+                        result = self.callback(event)
+                        if inspect.isawaitable(result):
+                            await result
+                    except Exception:  # pylint: disable=broad-except
+                        LOG.exception('subscriber %r failed', self.callback)
+
+
+class Bus:
+    """Deliver events to subscribers without waiting for them.
+
+    Each subscriber has a bounded queue and runs in its own task.  When
+    a slow subscriber's queue is full, the policy ``'drop_oldest'`` or
+    ``'drop_newest'`` throws an event away, and ``'coalesce'`` keeps
+    only the latest one.  Publishing never blocks.
+
+    """
+
+    def __init__(self):
+        """Start with no subscribers."""
+        self._closed = False
+        self._nursery = None
+        self._subscriptions = []
+
+    @property
+    def subscriptions(self):
+        """Return the current subscriptions."""
+        return list(self._subscriptions)
+
+    def subscribe(self, callback, max_events=16, policy='drop_oldest'):
+        """Call `callback`, sync or async, with each event.
+
+        Raises `trio.ClosedResourceError` once the bus is closing.
+
+        """
+        if self._closed:
+            raise trio.ClosedResourceError('the bus is closed')
+        subscription = Subscription(callback, max_events, policy)
+        self._subscriptions.append(subscription)
+        if self._nursery is not None:
+            self._start(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Stop delivering events to `subscription`."""
+        self._subscriptions.remove(subscription)
+        subscription.cancel_scope.cancel()
+
+    def _start(self, subscription):
+        """Run a subscriber in its own task."""
+        subscription.started = True
+        self._nursery.start_soon(subscription.run)
+
+    def start(self, nursery):
+        """Run the subscribers in `nursery`."""
+        self._nursery = nursery
+        for subscription in self._subscriptions:
+            if not subscription.started:
+                self._start(subscription)
+
+    def publish(self, event):
+        """Queue `event` for every subscriber."""
+        for subscription in self._subscriptions:
+            try:
+                subscription.send_ch.send_nowait(event)
+            except (trio.BrokenResourceError, trio.ClosedResourceError):
+                pass
+
+    async def aclose(self):
+        """Let the subscribers finish their queues and end."""
+        self._closed = True
+        for subscription in list(self._subscriptions):
+            await subscription.send_ch.aclose()
+
+
+class Announcer:
+    """Tell listeners which track is playing.
+
+    The synchronous `callback` is called in line, and the subscribers
+    of :attr:`bus` each get the track in a task of their own.
+
+    """
+
+    def __init__(self, callback=None):
+        """Call `callback` with each track."""
+        self._announced = False
+        self._async_callback = None
+        self._subscription = None
+        self.bus = Bus()
+        self.callback = callback
+
+    @property
+    def async_callback(self):
+        """Return the async callback."""
+        return self._async_callback
+
+    @async_callback.setter
+    def async_callback(self, value):
+        """Subscribe `value` to the bus in place of the last one."""
+        if self._subscription:
+            self.bus.unsubscribe(self._subscription)
+            self._subscription = None
+        self._async_callback = value
+        if value:
+            self._subscription = self.bus.subscribe(value)
+
+    def announce(self, track):
+        """Announce `track` to the callback and the subscribers."""
+        self._announced = True
+        if self.callback:
+            self.callback(track)
+        self.bus.publish(track)
+
+    def announce_first(self, track):
+        """Announce `track` unless some track was announced already."""
+        if not self._announced:
+            self.announce(track)
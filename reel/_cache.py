@@ -0,0 +1,366 @@
+"""PCMCache and Cached classes."""
+from collections import OrderedDict
+from contextlib import suppress
+import hashlib
+import logging
+import os
+import tempfile
+
+import trio
+
+from .config import get_xdg_cache_dir
+from ._chunk import ChunkSize
+from ._streamer import Streamer
+from ._track import run_sync_in_thread
+from ._transport import Transport
+
+LOG = logging.getLogger(__name__)
+
+_SENDFILE = hasattr(os, 'sendfile')
+
+
+def _open_or_none(path):
+    """Return `path` open for reading, or None if it is gone."""
+    try:
+        return open(path, 'rb')  # pylint: disable=consider-using-with
+    except FileNotFoundError as error:
+        LOG.debug(error)
+        return None
+
+
+class PCMCache:
+    """Decoded audio on disk, evicting the least recently used first.
+
+    Each entry is the complete output of one source, stored under a key
+    made from everything that determines that output.  The files never
+    add up to more than `max_bytes`.
+
+    """
+
+    def __init__(self, directory, max_bytes=4 * 1024**3):
+        """Keep entries in `directory`."""
+        self._directory = os.fspath(directory)
+        self._entries = OrderedDict()
+        self._total = 0
+        self.max_bytes = max_bytes
+        os.makedirs(self._directory, exist_ok=True)
+
+        # Pick up entries from earlier runs, oldest first.
+        found = []
+        for entry in os.scandir(self._directory):
+            if entry.name.endswith('.pcm'):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total += size
+        self.evict()
+
+    @classmethod
+    async def open(cls, max_bytes=4 * 1024**3, app=None):
+        """Return the cache in this app's xdg cache directory."""
+        return cls((await get_xdg_cache_dir(app)) / 'pcm', max_bytes)
+
+    @staticmethod
+    def key(*parts):
+        """Return the key for output determined by `parts`."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def __len__(self):
+        """Return the number of entries."""
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """Return whether `key` has an entry."""
+        return key in self._entries
+
+    @property
+    def directory(self):
+        """Return the directory holding the entries."""
+        return self._directory
+
+    @property
+    def size(self):
+        """Return the total size of the entries in bytes."""
+        return self._total
+
+    def path(self, key):
+        """Return the file name of the entry for `key`."""
+        return os.path.join(self._directory, f'{key}.pcm')
+
+    def lookup(self, key):
+        """Return the file name of a hit and mark it used, or None."""
+        if key not in self._entries:
+            return None
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._total -= self._entries.pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return path
+
+    def part_path(self, key):
+        """Create a new file to write an entry for `key` to, and name it.
+
+        Every writer gets a file of its own, even for the same key.
+
+        """
+        part_fd, path = tempfile.mkstemp(
+            suffix='.part', prefix=f'{key}.', dir=self._directory
+        )
+        os.close(part_fd)
+        return path
+
+    def commit(self, key, part_path):
+        """Make the finished file at `part_path` the entry for `key`."""
+        size = os.path.getsize(part_path)
+        os.replace(part_path, self.path(key))
+        self._total -= self._entries.pop(key, 0)
+        self._entries[key] = size
+        self._total += size
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until under budget."""
+        while self._total > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total -= size
+            LOG.debug('evict %s from pcm cache', key)
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def wrap(self, source, key):
+        """Return a streamer that plays `source` through this cache."""
+        return Cached(source, self, key)
+
+
+class _Part:
+    """An entry of a :class:`PCMCache` that is still being written."""
+
+    def __init__(self, cache, key, buffering=-1):
+        """Open a new part file for `key` in `cache`."""
+        self._cache = cache
+        self._key = key
+        self.path = cache.part_path(key)
+        # Closed by commit or discard.
+        # pylint: disable=consider-using-with
+        self.file = open(self.path, 'wb', buffering=buffering)
+
+    def write(self, chunk):
+        """Append a chunk of data."""
+        self.file.write(chunk)
+
+    def commit(self):
+        """Close the file and make it the entry for its key."""
+        self.file.close()
+        self._cache.commit(self._key, self.path)
+
+    def discard(self):
+        """Close the file and remove it."""
+        self.file.close()
+        with suppress(FileNotFoundError):
+            os.remove(self.path)
+
+
+class _Decode:
+    """A decode into the cache ahead of play, which play can follow."""
+
+    def __init__(self):
+        """Start before any data is written."""
+        self._grew = trio.hazmat.ParkingLot()
+        self.done = False
+        self.followed = False
+        self.scope = trio.CancelScope()
+
+    def grow(self):
+        """Wake the reader, there is more data."""
+        self._grew.unpark_all()
+
+    def finish(self):
+        """Mark every byte as written and wake the reader."""
+        self.done = True
+        self._grew.unpark_all()
+
+    async def wait(self):
+        """Wait for more data, unless there is no more to come."""
+        if not self.done:
+            await self._grew.park()
+
+
+class Cached(trio.abc.AsyncResource, Streamer):
+    """A source that is played from a :class:`PCMCache` when it can be.
+
+    A hit is read from the cache file, with sendfile(2) when relaying
+    to a file descriptor, and the source is never started.  A miss
+    plays the source and saves its output if it runs to completion.
+    :meth:`decode` fills the cache ahead of time, and a track started
+    before that is done follows the decoded data as it arrives.
+
+    """
+
+    # The source, its entry, the reader and the writer of the file, and
+    # a decode ahead of play each need a handle of their own.
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, source, cache, key):
+        """Play `source`, cached in `cache` under `key`."""
+        self._cache = cache
+        self._chunk_size = ChunkSize()
+        self._decoding = None
+        self._file = None
+        self._key = key
+        self._part = None
+        self._source = source
+        self.hit = None
+
+    def __str__(self):
+        """Print the source."""
+        return str(self._source)
+
+    def __repr__(self):
+        """Represent prettily."""
+        return f'Cached({self._source!r})'
+
+    def __or__(self, next_one):
+        """Combine with the next one as a transport."""
+        return Transport(self, next_one)
+
+    def __rshift__(self, next_one):
+        """Combine with the next one as a transport."""
+        return Transport(self, next_one)
+
+    @property
+    def source(self):
+        """Return the wrapped source."""
+        return self._source
+
+    def start(self, nursery, stdin=None):
+        """Open the cache file, or start the source on a miss."""
+        if self._decoding is not None and not self._decoding.done:
+            self._file = _open_or_none(self._part.path)
+            if self._file:
+                self._decoding.followed = True
+                self.hit = True
+                return
+        path = self._cache.lookup(self._key)
+        if path:
+            self._file = _open_or_none(path)
+            if self._file:
+                self.hit = True
+                return
+        self.hit = False
+        self._part = _Part(self._cache, self._key)
+        self._source.start(nursery, stdin)
+
+    async def decode(self):
+        """Run a miss into the cache before it is played."""
+        if self.hit is not None or self._decoding is not None:
+            return
+        if self._key in self._cache:
+            return
+        self._decoding = _Decode()
+        self._part = _Part(self._cache, self._key, buffering=0)
+        try:
+            with self._decoding.scope:
+                async with trio.open_nursery() as nursery:
+                    self._source.start(nursery)
+                    while True:
+                        chunk = await self._source.receive_some(
+                            self._chunk_size.size
+                        )
+                        if not chunk:
+                            break
+                        self._part.write(chunk)
+                        self._decoding.grow()
+
+                    # Stop following the part file before it is renamed.
+                    self._decoding.finish()
+                    await self._finish()
+        finally:
+            self._decoding.finish()
+            if self._part:
+                # Cancelled or failed part way, stop the source and drop
+                # the file.
+                self._part.discard()
+                self._part = None
+                proc = getattr(self._source, 'proc', None)
+                if proc and proc.returncode is None:
+                    proc.kill()
+                with trio.CancelScope(shield=True):
+                    await self._source.aclose()
+
+    async def _finish(self):
+        """Save the output of a source that ran to completion."""
+        proc = getattr(self._source, 'proc', None)
+        if proc is None or await proc.wait() == 0:
+            self._part.commit()
+        else:
+            self._part.discard()
+        self._part = None
+
+    async def receive_some(self, max_bytes):
+        """Return a chunk of data from the cache file or the source."""
+        if self._file:
+            decoding = self._decoding
+            while True:
+                # Once decoded, every byte was written before the read.
+                decoded = decoding is None or decoding.done
+                chunk = await run_sync_in_thread(self._file.read, max_bytes)
+                if chunk or decoded or not decoding.followed:
+                    return chunk
+                await decoding.wait()
+        chunk = await self._source.receive_some(max_bytes)
+        if self._part:
+            if chunk:
+                self._part.write(chunk)
+            else:
+                await self._finish()
+        return chunk
+
+    async def send_to_fd(self, fd):
+        """Send a hit to `fd` inside the kernel."""
+        following = self._decoding is not None and self._decoding.followed
+        if not (self._file and _SENDFILE) or following:
+            await super().send_to_fd(fd)
+            return
+        in_fd = self._file.fileno()
+        offset = self._file.tell()
+        while True:
+            await trio.hazmat.wait_writable(fd)
+            try:
+                sent = os.sendfile(fd, in_fd, offset, self._chunk_size.size)
+            except BlockingIOError:
+                continue
+            except BrokenPipeError as error:
+                LOG.debug(error)
+                break
+            if not sent:
+                break
+            offset += sent
+
+    async def send_all(self, chunk):
+        """Send a chunk of data to the source on a miss."""
+        if not self.hit:
+            await self._source.send_all(chunk)
+
+    async def aclose(self):
+        """Close the cache file, dropping an unfinished entry."""
+        if self._file:
+            self._file.close()
+            self._file = None
+        if self._decoding is not None:
+            # The decode owns its part file, and commits or drops it.
+            if not self._decoding.done:
+                self._decoding.scope.cancel()
+        elif self._part:
+            self._part.discard()
+            self._part = None
+        await self._source.aclose()
@@ -0,0 +1,267 @@
+"""Channels with a buffer policy for the hops in a transport."""
+from collections import deque, namedtuple
+import logging
+
+import trio
+
+from ._pcm import FRAME_SIZE, align
+
+LOG = logging.getLogger(__name__)
+
+POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+_Limits = namedtuple('_Limits', 'max_chunks max_bytes policy')
+
+
+def open_channel(max_chunks=0, max_bytes=None, policy='block'):
+    """Return a send and receive channel pair for one hop.
+
+    The buffer holds up to `max_chunks` chunks and `max_bytes` bytes.
+    When it is full the `policy` decides what happens to a new chunk:
+    ``'block'`` waits for room, ``'drop_oldest'`` throws away the oldest
+    buffered chunk and ``'drop_newest'`` throws away the new one.
+    Without `max_bytes` the values can be any objects, not just bytes.
+
+    """
+    if policy not in POLICIES:
+        raise ValueError(f'unknown buffer policy {policy!r}')
+    if policy == 'block' and max_bytes is None:
+        return trio.open_memory_channel(max_chunks)
+    state = _BufferState(max(max_chunks, 1), max_bytes, policy)
+    return BufferSendChannel(state), BufferReceiveChannel(state)
+
+
+class Hops:
+    """How a transport connects the streamers in its chain.
+
+    Hop ``n`` feeds ``chain[n]`` from ``chain[n - 1]`` and hop
+    ``len(chain)`` carries the output of the last streamer.  The
+    `buffers` and `framing` settings under the hop `None` apply to
+    every hop without its own.
+
+    """
+
+    def __init__(self):
+        """Connect with unbuffered memory channels."""
+        self.buffers = {}
+        self.framing = {}
+        self.kernel_pipes = False
+        self.pool_buffers = 0
+        self.zero_copy = False
+
+    def open(self, hop):
+        """Return a channel pair configured for `hop`."""
+        send_ch, receive_ch = open_channel(*self.buffers.get(
+            hop, self.buffers.get(None, (0, None, 'block'))
+        ))
+        frame_size = self.framing.get(hop, self.framing.get(None))
+        if frame_size:
+            send_ch = FramedSendChannel(send_ch, frame_size)
+        return send_ch, receive_ch
+
+    def can_pool(self, hop):
+        """Return whether `hop` can relay through a buffer pool."""
+        policy = self.buffers.get(hop, self.buffers.get(None))
+        return bool(
+            self.pool_buffers and
+            (policy is None or policy[2] == 'block') and
+            not self.framing.get(hop, self.framing.get(None))
+        )
+
+
+class _BufferState:
+    """The buffer shared by both ends of a channel."""
+
+    def __init__(self, max_chunks, max_bytes, policy):
+        """Start empty with one handle open on each end."""
+        self.chunks = deque()
+        self.dropped = 0
+        self.limits = _Limits(max_chunks, max_bytes, policy)
+        self.nbytes = 0
+        self.open = {'send': 1, 'receive': 1}
+        self.readable = trio.hazmat.ParkingLot()
+        self.writable = trio.hazmat.ParkingLot()
+
+    def sizeof(self, chunk):
+        """Return the size of a chunk when counting bytes."""
+        if self.limits.max_bytes is None:
+            return 0
+        return len(chunk)
+
+    def is_full(self, size):
+        """Return whether a chunk of `size` bytes has to wait or drop."""
+        if not self.chunks:
+            return False
+        if len(self.chunks) >= self.limits.max_chunks:
+            return True
+        return (self.limits.max_bytes is not None and
+                self.nbytes + size > self.limits.max_bytes)
+
+    def put(self, chunk):
+        """Buffer a chunk and wake the receivers."""
+        self.chunks.append(chunk)
+        self.nbytes += self.sizeof(chunk)
+        self.readable.unpark_all()
+
+    def take(self):
+        """Return the oldest chunk and wake the senders."""
+        chunk = self.chunks.popleft()
+        self.nbytes -= self.sizeof(chunk)
+        self.writable.unpark_all()
+        return chunk
+
+
+class BufferSendChannel(trio.abc.SendChannel):
+    """The sending end of a buffered hop."""
+
+    def __init__(self, state):
+        """Share the buffer `state`."""
+        self._closed = False
+        self._state = state
+
+    @property
+    def dropped(self):
+        """Return how many chunks were thrown away."""
+        return self._state.dropped
+
+    def clone(self):
+        """Return another handle on this end of the channel."""
+        if self._closed:
+            raise trio.ClosedResourceError
+        self._state.open['send'] += 1
+        return BufferSendChannel(self._state)
+
+    def send_nowait(self, value):
+        """Buffer `value` or raise `trio.WouldBlock`."""
+        state = self._state
+        if self._closed:
+            raise trio.ClosedResourceError
+        if not state.open['receive']:
+            raise trio.BrokenResourceError
+        while state.is_full(state.sizeof(value)):
+            if state.limits.policy == 'drop_newest':
+                state.dropped += 1
+                return
+            if state.limits.policy == 'drop_oldest':
+                state.take()
+                state.dropped += 1
+                continue
+            raise trio.WouldBlock
+        state.put(value)
+
+    async def send(self, value):
+        """Buffer `value`, waiting for room if the policy blocks."""
+        await trio.hazmat.checkpoint_if_cancelled()
+        while True:
+            try:
+                self.send_nowait(value)
+            except trio.WouldBlock:
+                await self._state.writable.park()
+            else:
+                break
+        await trio.hazmat.cancel_shielded_checkpoint()
+
+    async def aclose(self):
+        """Close this handle and end the stream after the last one."""
+        if not self._closed:
+            self._closed = True
+            self._state.open['send'] -= 1
+            if not self._state.open['send']:
+                self._state.readable.unpark_all()
+        await trio.hazmat.checkpoint()
+
+
+class BufferReceiveChannel(trio.abc.ReceiveChannel):
+    """The receiving end of a buffered hop."""
+
+    def __init__(self, state):
+        """Share the buffer `state`."""
+        self._closed = False
+        self._state = state
+
+    @property
+    def dropped(self):
+        """Return how many chunks were thrown away."""
+        return self._state.dropped
+
+    def clone(self):
+        """Return another handle on this end of the channel."""
+        if self._closed:
+            raise trio.ClosedResourceError
+        self._state.open['receive'] += 1
+        return BufferReceiveChannel(self._state)
+
+    def receive_nowait(self):
+        """Return the oldest chunk or raise `trio.WouldBlock`."""
+        state = self._state
+        if self._closed:
+            raise trio.ClosedResourceError
+        if state.chunks:
+            return state.take()
+        if not state.open['send']:
+            raise trio.EndOfChannel
+        raise trio.WouldBlock
+
+    async def receive(self):
+        """Return the oldest chunk, waiting for one if necessary."""
+        await trio.hazmat.checkpoint_if_cancelled()
+        while True:
+            try:
+                value = self.receive_nowait()
+            except trio.WouldBlock:
+                await self._state.readable.park()
+            else:
+                break
+        await trio.hazmat.cancel_shielded_checkpoint()
+        return value
+
+    async def aclose(self):
+        """Close this handle and drop the buffer after the last one."""
+        if not self._closed:
+            self._closed = True
+            self._state.open['receive'] -= 1
+            if not self._state.open['receive']:
+                self._state.chunks.clear()
+                self._state.nbytes = 0
+                self._state.writable.unpark_all()
+        await trio.hazmat.checkpoint()
+
+
+class FramedSendChannel(trio.abc.SendChannel):
+    """A send channel that only passes on whole frames.
+
+    A partial frame left when the channel closes is dropped.
+
+    """
+
+    def __init__(self, channel, frame_size=FRAME_SIZE):
+        """Send whole frames of `frame_size` bytes to `channel`."""
+        self._carry = b''
+        self._channel = channel
+        self.frame_size = frame_size
+
+    def clone(self):
+        """Return another handle with its own carry."""
+        return FramedSendChannel(self._channel.clone(), self.frame_size)
+
+    def send_nowait(self, value):
+        """Send the whole frames so far or raise `trio.WouldBlock`."""
+        frames, carry = align(self._carry, value, self.frame_size)
+        if frames:
+            self._channel.send_nowait(frames)
+        self._carry = carry
+
+    async def send(self, value):
+        """Send the whole frames so far."""
+        frames, self._carry = align(self._carry, value, self.frame_size)
+        if frames:
+            await self._channel.send(frames)
+        else:
+            await trio.hazmat.checkpoint()
+
+    async def aclose(self):
+        """Drop a partial frame and close the channel."""
+        if self._carry:
+            LOG.debug('dropping %d bytes of a partial frame', len(self._carry))
+            self._carry = b''
+        await self._channel.aclose()
@@ -0,0 +1,77 @@
+"""ChunkSize class."""
+import copy
+import logging
+
+LOG = logging.getLogger(__name__)
+
+
+class ChunkSize:
+    """How many bytes a streamer asks for on each read.
+
+    A fixed policy always asks for `size` bytes.  Give a `minimum` or a
+    `maximum` to make it adaptive: the size doubles when a read comes
+    back full and halves when a read comes back less than half full.
+    Sizes are always a multiple of `frame` bytes.
+
+    """
+
+    def __init__(self, size=16384, frame=1, minimum=None, maximum=None):
+        """Start reading `size` bytes at a time."""
+        self._adaptive = minimum is not None or maximum is not None
+        self._frame = frame
+        self._maximum = self._align(maximum or size)
+        self._minimum = self._align(minimum or size)
+        self._size = min(max(self._align(size), self._minimum), self._maximum)
+
+    def __repr__(self):
+        """Represent prettily."""
+        if self._adaptive:
+            return (f'ChunkSize({self._size}, frame={self._frame}, '
+                    f'minimum={self._minimum}, maximum={self._maximum})')
+        return f'ChunkSize({self._size}, frame={self._frame})'
+
+    @classmethod
+    def fixed(cls, size):
+        """Return a policy that always reads `size` bytes."""
+        return cls(size)
+
+    @classmethod
+    def frames(cls, count, frame=4):
+        """Return a policy that reads `count` whole frames at a time.
+
+        The default frame is one sample of s16le stereo.
+
+        """
+        return cls(count * frame, frame=frame)
+
+    @classmethod
+    def adaptive(cls, minimum=4096, maximum=1024**2, frame=1):
+        """Return a policy that grows for throughput and shrinks when idle."""
+        return cls(minimum, frame=frame, minimum=minimum, maximum=maximum)
+
+    @property
+    def size(self):
+        """Return the number of bytes to read next."""
+        return self._size
+
+    @property
+    def maximum(self):
+        """Return the most bytes a read will ask for."""
+        return self._maximum
+
+    def _align(self, size):
+        """Round `size` down to a whole frame, but keep at least one."""
+        return max(size - size % self._frame, self._frame)
+
+    def update(self, received):
+        """Adapt to a read that returned `received` bytes."""
+        if not self._adaptive:
+            return
+        if received >= self._size:
+            self._size = min(self._size * 2, self._maximum)
+        elif received < self._size // 2:
+            self._size = max(self._align(self._size // 2), self._minimum)
+
+    def copy(self):
+        """Return a policy with the same settings and its own state."""
+        return copy.copy(self)
@@ -0,0 +1,52 @@
+"""Crossfade class."""
+import logging
+
+from ._pcm import BYTES_PER_SECOND, CURVES, FRAME_SIZE, crossfade
+
+LOG = logging.getLogger(__name__)
+
+
+class Crossfade:
+    """Hold back the end of each track to blend it into the next.
+
+    The last `seconds` of s16le stereo of the playing track are held
+    back, and when the track ends they are mixed with as much of the
+    start of the next track on the `curve`.
+
+    """
+
+    def __init__(self, seconds=2.0, curve='equal_power'):
+        """Fade over `seconds` on the `curve`."""
+        if curve not in CURVES:
+            raise ValueError(f'unknown fade curve {curve!r}')
+        fade_bytes = int(seconds * BYTES_PER_SECOND)
+        self._held = bytearray()
+        self.curve = curve
+        self.fade_bytes = fade_bytes - fade_bytes % FRAME_SIZE
+
+    def hold(self, chunk):
+        """Hold back `chunk` and return the frames older than the fade."""
+        self._held += chunk
+        excess = len(self._held) - self.fade_bytes
+        excess -= excess % FRAME_SIZE
+        if excess <= 0:
+            return b''
+        result = bytes(self._held[:excess])
+        del self._held[:excess]
+        return result
+
+    def tail(self):
+        """Return the whole frames held back from the track that ended."""
+        tail, self._held = self._held, bytearray()
+        del tail[len(tail) - len(tail) % FRAME_SIZE:]
+        return tail
+
+    def blend(self, tail, head):
+        """Mix `tail` into `head` and hold back the rest of `head`."""
+        self._held += head[len(tail):]
+        return crossfade(tail, head, self.curve)
+
+    def flush(self):
+        """Return whatever is held back of the last track."""
+        result, self._held = bytes(self._held), bytearray()
+        return result
@@ -10,6 +10,9 @@ from ._spool import Spool
 
 LOG = logging.getLogger(__name__)
 
+# The most stdout a daemon keeps, the rest is read and thrown away.
+MAX_STDOUT = 65536
+
 
 class Daemon(Spool):
     """A background process."""
@@ -55,12 +58,29 @@ class Daemon(Spool):
             # Give the subclasses a chance to fill in configuration vars
             await self._prepare(config)
 
-        self._proc = trio.Process(
-            self._command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            env=self._env
-        )
-        nursery.start_soon(self._handle_stdout)
+        self._proc = self._open_process(None, subprocess.PIPE)
+        nursery.start_soon(self._drain_stdout)
         nursery.start_soon(self._handle_stderr)
         task_status.started()
+
+    async def _drain_stdout(self):
+        """Read stdout for as long as the daemon runs, keeping the start.
+
+        A daemon can run for days, so only the first `MAX_STDOUT` bytes
+        are kept.  The rest is still read so the pipe never fills up.
+
+        """
+        kept = 0
+        while True:
+            try:
+                chunk = await self._proc.stdout.receive_some(
+                    self._chunk_size.size
+                )
+            except trio.ClosedResourceError:
+                LOG.debug('Stdout closed', exc_info=True)
+                break
+            if not chunk:
+                break
+            if kept < MAX_STDOUT:
+                self._stdout.write(chunk[:MAX_STDOUT - kept])
+                kept += len(chunk)
@@ -0,0 +1,230 @@
+"""Deck and TrackSource classes."""
+from collections import deque
+from collections.abc import Sequence
+import logging
+
+from ._queue import PlayQueue
+
+LOG = logging.getLogger(__name__)
+
+
+async def _iterate(tracks):
+    """Iterate `tracks` once, across any number of ``async for`` loops."""
+    async for track in tracks:
+        yield track
+
+
+class TrackSource:
+    """Where the tracks of a reel come from.
+
+    A list is played in order, an iterator or async iterator is pulled
+    only as far as it needs to be, and a :class:`PlayQueue` is played
+    in its current order.  Tracks pulled ahead of time wait here until
+    they are taken.
+
+    """
+
+    def __init__(self, tracks):
+        """Take tracks from a list, iterator, async iterator or queue."""
+        self._aiter = None
+        self._iter = None
+        self._pulled = deque()
+        self._tracks = tracks
+        self.queue = None
+        self.sequence = None
+        if isinstance(tracks, PlayQueue):
+            self.queue = tracks
+        elif hasattr(tracks, '__aiter__'):
+            self._aiter = _iterate(tracks)
+        elif isinstance(tracks, Sequence):
+            self.sequence = tracks
+
+    @property
+    def is_async(self):
+        """Return whether the tracks come from an async iterator."""
+        return self._aiter is not None
+
+    @property
+    def pulled(self):
+        """Return the tracks pulled ahead that have not been taken."""
+        return list(self._pulled)
+
+    def _pull(self):
+        """Return the next track from a sync source, or None."""
+        if self._aiter is not None:
+            return None
+        if self._iter is None:
+            self._iter = iter(self._tracks)
+        return next(self._iter, None)
+
+    def pull(self):
+        """Take the next track, or return None."""
+        if self._pulled:
+            return self._pulled.popleft()
+        return self._pull()
+
+    def ahead(self, count):
+        """Return the next `count` tracks without taking them."""
+        while len(self._pulled) < count:
+            track = self._pull()
+            if track is None:
+                break
+            self._pulled.append(track)
+        return list(self._pulled)[:count]
+
+    async def fill(self, count):
+        """Pull an async source until `count` tracks are waiting."""
+        if len(self._pulled) >= count:
+            return
+        async for track in self._aiter:
+            self._pulled.append(track)
+            if len(self._pulled) >= count:
+                break
+
+    async def aclose(self):
+        """Forget the pulled tracks and close an iterator source."""
+        self._pulled.clear()
+        if self._aiter is not None:
+            await self._aiter.aclose()
+        if hasattr(self._tracks, 'aclose'):
+            await self._tracks.aclose()
+        elif hasattr(self._tracks, 'close'):
+            self._tracks.close()
+
+
+class Deck:
+    """The track that is playing and the ones started ahead of it.
+
+    The next `depth` tracks wait on deck, already started, so that each
+    one plays as soon as the one before it ends.
+
+    """
+
+    def __init__(self, tracks, depth=1):
+        """Play tracks from a list, iterator, async iterator or queue."""
+        self.current = None
+        self.depth = depth
+        self.nursery = None
+        self.source = TrackSource(tracks)
+        self.started = set()
+        self.stdin = None
+        self.upcoming = deque()
+
+    @property
+    def next_track(self):
+        """Return the next track on deck."""
+        if self.upcoming:
+            return self.upcoming[0]
+        return None
+
+    @property
+    def tracks(self):
+        """Return the list of tracks, or the ones on deck if lazy."""
+        if self.source.sequence is not None:
+            return self.source.sequence
+        if self.source.queue is not None:
+            result = list(self.source.queue)
+        else:
+            result = list(self.upcoming)
+        if self.current is not None:
+            result.insert(0, self.current)
+        return result
+
+    def start(self, nursery, stdin=None):
+        """Start tracks in `nursery` with `stdin`."""
+        self.nursery = nursery
+        self.stdin = stdin
+
+    def start_track(self, track):
+        """Start `track` ahead of time."""
+        track.start(self.nursery, self.stdin)
+        self.started.add(track)
+
+    def needed(self, extra=0):
+        """Return how many tracks to pull for the next track change."""
+        if self.current is None and not self.upcoming:
+            return 1 + self.depth + extra
+        if self.upcoming:
+            return self.depth + 1 - len(self.upcoming) + extra
+        return 0
+
+    def ahead(self, count):
+        """Return up to `count` tracks that come after the ones on deck."""
+        if self.source.queue is not None:
+            return self.source.queue.head(len(self.upcoming) + count)
+        return self.source.ahead(count)
+
+    def change(self, prefetch, close):
+        """Play the next track and start the ones after it with `prefetch`.
+
+        Started tracks that leave a queue are closed with `close`.
+
+        """
+        # Play the queue in its current order.
+        if self.source.queue is not None:
+            self.current = self.source.queue.pop()
+            if self.current is None:
+                self.upcoming.clear()
+                return
+            if self.current not in self.started:
+                prefetch(self.current)
+            self.reschedule(prefetch, close)
+            return
+
+        # Start at the beginning without a current track.
+        if self.current is None and not self.upcoming:
+            self.current = self.source.pull()
+            if self.current is not None:
+                prefetch(self.current)
+        elif self.upcoming:
+            self.current = self.upcoming.popleft()
+        else:
+            self.current = None
+
+        # Prefetch upcoming tracks by starting them.
+        while self.current is not None and len(self.upcoming) < self.depth:
+            track = self.source.pull()
+            if track is None:
+                break
+            prefetch(track)
+            self.upcoming.append(track)
+
+    def reschedule(self, prefetch, close):
+        """Keep the tracks on deck in step with the queue.
+
+        Tracks that stay on deck are left alone.  A started track that
+        drops back in the queue keeps its place in the output, and any
+        started track that is no longer in the queue is closed.
+
+        """
+        if self.nursery is None or self.current is None:
+            return
+        queue = self.source.queue
+        wanted = queue.head(self.depth)
+        for track in list(self.started):
+            if track is self.current:
+                continue
+            if track not in wanted and track not in queue:
+                self.started.discard(track)
+                self.nursery.start_soon(close, track)
+        for track in wanted:
+            if track not in self.started:
+                prefetch(track)
+        self.upcoming = deque(wanted)
+
+    async def aclose(self, others=()):
+        """Close every track that was started or pulled, and `others`."""
+        tracks = list(self.tracks)
+        for track in tracks:
+            await track.aclose()
+
+        # Started tracks that fell back in the queue or left it, and
+        # pulled tracks that may be decoding ahead.
+        for track in [*self.started, *self.source.pulled, *others]:
+            if not any(track is other for other in tracks):
+                tracks.append(track)
+                await track.aclose()
+        self.started.clear()
+        self.current = None
+        self.upcoming.clear()
+        await self.source.aclose()
@@ -0,0 +1,85 @@
+"""Framer class."""
+import logging
+
+import trio
+
+from ._chunk import ChunkSize
+from ._pcm import FRAME_SIZE, Aligner
+from ._streamer import Streamer
+from ._transport import Transport
+
+LOG = logging.getLogger(__name__)
+
+
+class Framer(trio.abc.AsyncResource, Streamer):
+    """Pass a stream on in chunks of whole frames.
+
+    Subprocess output comes in any number of bytes, so a chunk can end
+    in the middle of a sample.  A framer carries the partial frame over
+    to the next chunk and passes aligned chunks on untouched, which lets
+    in-process audio stages work on every chunk as an array.  A partial
+    frame at the very end is dropped.
+
+    """
+
+    def __init__(self, frame_size=FRAME_SIZE):
+        """Cut the stream into frames of `frame_size` bytes."""
+        self._aligner = Aligner(frame_size)
+        self._chunk_size = ChunkSize(16384, frame=frame_size)
+        self._pending = b''
+        self._send_ch, self._receive_ch = trio.open_memory_channel(0)
+
+    def __repr__(self):
+        """Represent prettily."""
+        return f'Framer({self._aligner.frame_size})'
+
+    def __or__(self, next_one):
+        """Combine with the next one as a transport."""
+        return Transport(self, next_one)
+
+    def __rshift__(self, next_one):
+        """Combine with the next one as a transport."""
+        return Transport(self, next_one)
+
+    async def aclose(self):
+        """Close both ends."""
+        await self._send_ch.aclose()
+        await self._receive_ch.aclose()
+
+    def start(self, nursery, stdin=None):
+        """Start with `stdin` as the only input, if given."""
+        if stdin:
+            nursery.start_soon(self._send_and_close, stdin)
+
+    async def _send_and_close(self, chunk):
+        """Send one chunk and end the input."""
+        async with self._send_ch:
+            await self._send_ch.send(chunk)
+
+    async def send_all(self, chunk):
+        """Send a chunk of data to the input of this stream."""
+        await self._send_ch.send(chunk)
+
+    async def receive_from_channel(self, channel):
+        """Take the input from `channel` and end with it."""
+        async with channel, self._send_ch:
+            async for chunk in channel:
+                await self._send_ch.send(chunk)
+
+    async def receive_some(self, max_bytes):
+        """Return up to `max_bytes` of whole frames, at least one frame."""
+        while not self._pending:
+            try:
+                chunk = await self._receive_ch.receive()
+            except (trio.EndOfChannel, trio.ClosedResourceError):
+                self._aligner.drop()
+                return b''
+            self._pending = self._aligner.align(chunk)
+        frame_size = self._aligner.frame_size
+        limit = max(max_bytes - max_bytes % frame_size, frame_size)
+        if len(self._pending) <= limit:
+            chunk, self._pending = self._pending, b''
+            return chunk
+        chunk = self._pending[:limit]
+        self._pending = self._pending[limit:]
+        return chunk
@@ -0,0 +1,82 @@
+"""How to launch the subprocess of a spool."""
+import functools
+import logging
+import os
+import shutil
+import subprocess
+
+import trio
+
+from ._relay import Pipes
+
+LOG = logging.getLogger(__name__)
+
+LAUNCHERS = ('fork', 'spawn')
+
+
+@functools.lru_cache(maxsize=256)
+def _which(name, path):
+    """Return the absolute path of the program `name`, or None."""
+    return shutil.which(name, path=path)
+
+
+def launch_options(launcher, command, env=None):
+    """Return the command and extra Popen arguments for `launcher`.
+
+    ``'fork'`` is the usual fork and exec.  ``'spawn'`` lets the
+    subprocess module use posix_spawn(3), which does not copy the page
+    tables of the parent, so it takes the same time however big this
+    process grows.  That needs an absolute program path and leaves the
+    parent's non-inheritable file descriptors to the close-on-exec flag
+    instead of closing them one by one.
+
+    """
+    if launcher not in LAUNCHERS:
+        raise ValueError(f'unknown launcher {launcher!r}')
+    if launcher == 'fork':
+        return command, {}
+    if not os.path.dirname(command[0]):
+        path = (env or os.environ).get('PATH', os.defpath)
+        program = _which(command[0], path)
+        if program:
+            command = [program] + list(command[1:])
+    if not getattr(subprocess, '_USE_POSIX_SPAWN', False):
+        LOG.debug('posix_spawn is not available, launching with fork')
+    return command, {'close_fds': False}
+
+
+class Launch:
+    """The environment, launcher and pipes a spool starts its command with."""
+
+    def __init__(self, env):
+        """Launch with `env` by fork and exec over the usual pipes."""
+        self.env = env
+        self.launcher = 'fork'
+        self.pipes = Pipes()
+
+    def use(self, launcher):
+        """Launch with ``'fork'`` or ``'spawn'``."""
+        if launcher not in LAUNCHERS:
+            raise ValueError(f'unknown launcher {launcher!r}')
+        self.launcher = launcher
+
+    def open(self, command, stdin=subprocess.PIPE, stdout=subprocess.PIPE):
+        """Start `command` and return its :class:`trio.Process`.
+
+        Pipes connected with :meth:`~reel._relay.Pipes.pipe_out` and
+        :meth:`~reel._relay.Pipes.pipe_in` stand in for `stdin` and
+        `stdout`.
+
+        """
+        stdin, stdout = self.pipes.stdio(stdin, stdout)
+        command, options = launch_options(self.launcher, command, self.env)
+        proc = trio.Process(
+            command,
+            stdin=stdin,
+            stdout=stdout,
+            stderr=subprocess.PIPE,
+            env=self.env,
+            **options
+        )
+        self.pipes.started(proc)
+        return proc
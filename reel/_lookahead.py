@@ -0,0 +1,70 @@
+"""Lookahead class."""
+import logging
+import os
+
+import trio
+
+LOG = logging.getLogger(__name__)
+
+
+class Lookahead:
+    """Decode upcoming tracks into a cache in the background.
+
+    Tracks that can decode ahead of time, like ``ffmpeg.read(uri,
+    cache=...)``, are handed to `workers` tasks nearest first.  A track
+    that fails to decode is played from its source instead.
+
+    """
+
+    def __init__(self, tracks=2, workers=None):
+        """Decode up to `tracks` ahead with `workers` tasks."""
+        if workers is None:
+            workers = max((os.cpu_count() or 1) - 1, 1)
+        self._channel = None
+        self._decoding = set()
+        self.tracks = tracks
+        self.workers = workers
+
+    @property
+    def decoding(self):
+        """Return the tracks handed to the workers."""
+        return list(self._decoding)
+
+    def start(self, nursery):
+        """Run the workers in `nursery`."""
+        self._channel, receive_ch = trio.open_memory_channel(float('inf'))
+        for _ in range(self.workers):
+            nursery.start_soon(self._decode, receive_ch.clone())
+        nursery.start_soon(receive_ch.aclose)
+
+    def schedule(self, tracks, started):
+        """Hand the `tracks` that are not `started` to the workers."""
+        for track in tracks:
+            if track in started or track in self._decoding:
+                continue
+            if hasattr(track, 'decode'):
+                self._decoding.add(track)
+                try:
+                    self._channel.send_nowait(track)
+                except trio.ClosedResourceError:
+                    pass
+
+    def discard(self, track):
+        """Forget `track`, which is playing or closed."""
+        self._decoding.discard(track)
+
+    async def aclose(self):
+        """Let the workers finish the tracks they have."""
+        self._decoding.clear()
+        if self._channel:
+            await self._channel.aclose()
+
+    @staticmethod
+    async def _decode(channel):
+        """Decode the tracks sent to one worker in order."""
+        async with channel:
+            async for track in channel:
+                try:
+                    await track.decode()
+                except Exception as error:  # pylint: disable=broad-except
+                    LOG.warning('could not decode %s ahead: %r', track, error)
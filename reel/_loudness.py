@@ -0,0 +1,228 @@
+"""Loudness class."""
+from collections import namedtuple
+from contextlib import suppress
+import hashlib
+import json
+import logging
+import math
+import os
+import tempfile
+
+import trio
+
+from .config import get_xdg_cache_dir
+from .cmd import ffmpeg
+from ._spool import Spool
+from ._track import run_sync_in_thread
+
+LOG = logging.getLogger(__name__)
+
+Measurement = namedtuple(
+    'Measurement', ['integrated', 'true_peak', 'lra', 'threshold', 'offset']
+)
+
+# The fields of a loudnorm json report, in the order of a Measurement.
+_REPORT_FIELDS = (
+    'input_i', 'input_tp', 'input_lra', 'input_thresh', 'target_offset'
+)
+
+
+def parse_report(stderr):
+    """Return the Measurement in the loudnorm json on `stderr`, or None."""
+    start = stderr.rfind('{') if stderr else -1
+    if start < 0:
+        return None
+    try:
+        report = json.loads(stderr[start:stderr.index('}', start) + 1])
+        return Measurement(*(float(report[key]) for key in _REPORT_FIELDS))
+    except (KeyError, ValueError) as error:
+        LOG.debug('bad loudnorm report: %s', error)
+        return None
+
+
+def _digest(path):
+    """Return the sha256 of the contents of the file at `path`."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(1024**2), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Loudness:
+    """Measure the loudness of tracks once and normalize them in play.
+
+    The first pass of ffmpeg's loudnorm filter runs once per track and
+    its integrated loudness, loudness range and true peak are kept in
+    `directory`, keyed by the contents of the file, so a renamed or
+    copied file is not measured again.  A track is then played with a
+    plain gain, or with a second loudnorm pass that knows the
+    measurements, which is more exact than one pass and costs less.
+
+    """
+
+    def __init__(self, directory, target=-16.0, true_peak=-1.5, lra=11.0):
+        """Keep measurements in `directory` for the `target` in LUFS."""
+        self._digests = {}
+        self._directory = os.fspath(directory)
+        self.lra = lra
+        self.target = target
+        self.true_peak = true_peak
+        os.makedirs(self._directory, exist_ok=True)
+
+    @classmethod
+    async def open(cls, app=None, **kwargs):
+        """Return the measurements in this app's xdg cache directory."""
+        return cls((await get_xdg_cache_dir(app)) / 'loudness', **kwargs)
+
+    def __repr__(self):
+        """Represent prettily."""
+        return (f'Loudness({self._directory!r}, target={self.target}, '
+                f'true_peak={self.true_peak}, lra={self.lra})')
+
+    @property
+    def directory(self):
+        """Return the directory holding the measurements."""
+        return self._directory
+
+    @property
+    def _loudnorm(self):
+        """Return the loudnorm settings for the target."""
+        return f'loudnorm=I={self.target}:TP={self.true_peak}:LRA={self.lra}'
+
+    async def key(self, uri):
+        """Return the key for the contents of `uri` and the target."""
+        digest = hashlib.sha256()
+        try:
+            stat = os.stat(uri)
+        except (OSError, ValueError):
+            digest.update(str(uri).encode('utf-8'))
+        else:
+            # Hash each file once per process, in a thread.
+            memo = (os.fspath(uri), stat.st_size, stat.st_mtime_ns)
+            if memo not in self._digests:
+                self._digests[memo] = await run_sync_in_thread(_digest, uri)
+            digest.update(self._digests[memo].encode('utf-8'))
+        digest.update(f'\0{self._loudnorm}'.encode('utf-8'))
+        return digest.hexdigest()
+
+    def path(self, key):
+        """Return the file name of the measurement for `key`."""
+        return os.path.join(self._directory, f'{key}.json')
+
+    def lookup(self, key):
+        """Return the stored Measurement for `key`, or None."""
+        try:
+            with open(self.path(key), encoding='utf-8') as stored:
+                return Measurement(**json.load(stored))
+        except FileNotFoundError:
+            return None
+        except (TypeError, ValueError) as error:
+            LOG.debug('bad loudness entry %s: %s', key, error)
+            return None
+
+    def store(self, key, measurement):
+        """Keep `measurement` under `key`.
+
+        Every writer gets a part file of its own, even for the same key.
+
+        """
+        part_fd, part_path = tempfile.mkstemp(
+            suffix='.part', prefix=f'{key}.', dir=self._directory
+        )
+        try:
+            with open(part_fd, 'w', encoding='utf-8') as part:
+                json.dump(measurement._asdict(), part)
+            os.replace(part_path, self.path(key))
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.remove(part_path)
+            raise
+
+    async def analyze(self, uri):
+        """Run the measuring pass over `uri` and return a Measurement."""
+        spool = Spool('ffmpeg', xflags=[
+            '-hide_banner', '-nostats', '-i', uri,
+            '-af', f'{self._loudnorm}:print_format=json',
+            '-f', 'null', '-',
+        ])
+        await spool.run()
+        if spool.returncode != 0:
+            LOG.warning('could not measure %s: %s', uri, spool.stderr)
+            return None
+        return parse_report(spool.stderr)
+
+    async def measure(self, uri):
+        """Return the Measurement of `uri`, measuring it the first time."""
+        key = await self.key(uri)
+        measurement = await run_sync_in_thread(self.lookup, key)
+        if measurement is None:
+            measurement = await self.analyze(uri)
+            if measurement is not None:
+                await run_sync_in_thread(self.store, key, measurement)
+        return measurement
+
+    async def measure_all(self, uris, workers=None):
+        """Measure a whole library, `workers` tracks at a time.
+
+        Each measurement is an ffmpeg process of its own, so by default
+        there is one worker for each core.  Returns a dict of each uri
+        and its Measurement, or None where it failed.
+
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        results = {}
+
+        async def work(channel):
+            """Measure uris from `channel` until it runs dry."""
+            async with channel:
+                async for uri in channel:
+                    results[uri] = await self.measure(uri)
+
+        send_ch, receive_ch = trio.open_memory_channel(0)
+        async with trio.open_nursery() as nursery:
+            async with receive_ch:
+                for _ in range(max(workers, 1)):
+                    nursery.start_soon(work, receive_ch.clone())
+            async with send_ch:
+                for uri in uris:
+                    await send_ch.send(uri)
+        return results
+
+    def gain(self, measurement):
+        """Return the gain in dB that brings a track to the target.
+
+        The gain never pushes the true peak above the limit.
+
+        """
+        if not math.isfinite(measurement.integrated):
+            return 0.0
+        gain = self.target - measurement.integrated
+        if math.isfinite(measurement.true_peak):
+            gain = min(gain, self.true_peak - measurement.true_peak)
+        return gain
+
+    def filters(self, measurement, precise=False):
+        """Return the ffmpeg filter that normalizes a measured track.
+
+        The `precise` loudnorm pass needs every measurement to be finite,
+        so a silent track gets the plain gain instead.
+
+        """
+        if not precise or not all(map(math.isfinite, measurement)):
+            return f'volume={self.gain(measurement):.2f}dB'
+        return (f'{self._loudnorm}'
+                f':measured_I={measurement.integrated}'
+                f':measured_TP={measurement.true_peak}'
+                f':measured_LRA={measurement.lra}'
+                f':measured_thresh={measurement.threshold}'
+                f':offset={measurement.offset}:linear=true')
+
+    async def read(self, uri, precise=False, cache=None):
+        """Return a spool that plays `uri` normalized to the target."""
+        measurement = await self.measure(uri)
+        filters = None
+        if measurement is not None:
+            filters = self.filters(measurement, precise)
+        return ffmpeg.read(uri, cache=cache, filters=filters)
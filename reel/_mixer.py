@@ -0,0 +1,169 @@
+"""Mixer class."""
+from collections import namedtuple
+import logging
+
+import trio
+
+from ._chunk import ChunkSize
+from ._pcm import BYTES_PER_SECOND, FRAME_SIZE, require_numpy, to_bytes
+from ._streamer import Streamer
+from ._transport import Transport
+
+LOG = logging.getLogger(__name__)
+
+
+MixSettings = namedtuple(
+    'MixSettings', ['underrun', 'frame_size', 'max_bytes', 'startup'],
+    defaults=(0.05, FRAME_SIZE, BYTES_PER_SECOND, 1.0)
+)
+
+# Buffered output of one source in a mix.
+_Input = namedtuple('_Input', ['source', 'buffer', 'started', 'ended'])
+
+
+class Mixer(trio.abc.AsyncResource, Streamer):
+    """Mix several s16le streams into one.
+
+    Each source is read into its own buffer of up to `max_bytes`.  A
+    block of output waits for each source to have data, but no longer
+    than `underrun` seconds, or `startup` seconds for the first block,
+    after which a source that is behind, has not started yet or has
+    ended is filled in with silence.  Sums saturate at the int16 limits.
+    Those options come in a :class:`MixSettings`.
+
+    """
+
+    def __init__(self, sources, gains=None, settings=MixSettings()):
+        """Mix `sources`, each scaled by its gain."""
+        require_numpy()
+        if gains is None:
+            gains = [1.0] * len(sources)
+        self._changed = trio.hazmat.ParkingLot()
+        self._chunk_size = ChunkSize(16384, frame=settings.frame_size)
+        self._drained = trio.hazmat.ParkingLot()
+        self._gains = list(gains)
+        self._inputs = [
+            _Input(source, bytearray(), trio.Event(), trio.Event())
+            for source in sources
+        ]
+        self._settings = settings
+        self._started = False
+
+    def __str__(self):
+        """Print the sources."""
+        return self.__repr__()
+
+    def __repr__(self):
+        """Represent prettily."""
+        result = 'Mixer([ '
+        for mixed in self._inputs:
+            result += mixed.source.__repr__()
+            result += ','
+        result += ' ])'
+        return result
+
+    def __or__(self, next_one):
+        """Combine with the next one as a transport."""
+        return Transport(self, next_one)
+
+    def __rshift__(self, next_one):
+        """Combine with the next one as a transport."""
+        return Transport(self, next_one)
+
+    @property
+    def sources(self):
+        """Return the list of sources."""
+        return [mixed.source for mixed in self._inputs]
+
+    @property
+    def gains(self):
+        """Return the gain of each source."""
+        return list(self._gains)
+
+    def set_gain(self, index, gain):
+        """Change the gain of the source at `index` while mixing."""
+        self._gains[index] = gain
+
+    async def aclose(self):
+        """Close the sources."""
+        for mixed in self._inputs:
+            await mixed.source.aclose()
+
+    def start(self, nursery, stdin=None):
+        """Start the sources and begin buffering their output."""
+        for mixed in self._inputs:
+            mixed.source.start(nursery)
+            nursery.start_soon(self._pump, mixed)
+
+    async def _pump(self, mixed):
+        """Buffer the output of one source."""
+        while True:
+            while len(mixed.buffer) >= self._settings.max_bytes:
+                await self._drained.park()
+            chunk = await mixed.source.receive_some(self._chunk_size.size)
+            if not chunk:
+                break
+            mixed.buffer.extend(chunk)
+            mixed.started.set()
+            self._changed.unpark_all()
+        mixed.ended.set()
+        self._changed.unpark_all()
+        await mixed.source.aclose()
+
+    def _is_ready(self, nbytes):
+        """Return whether every live source has a full block."""
+        return all(
+            mixed.ended.is_set() or len(mixed.buffer) >= nbytes
+            for mixed in self._inputs
+        )
+
+    async def send_all(self, chunk):
+        """Ignore input, a mixer reads from its sources."""
+
+    async def receive_some(self, max_bytes):
+        """Return a block of mixed audio, or EOF when all sources end."""
+        numpy = require_numpy()
+        frame_size = self._settings.frame_size
+        nbytes = max(max_bytes - max_bytes % frame_size, frame_size)
+        timeout = self._settings.underrun
+        if not self._started:
+            # Give the sources time to launch before the first block.
+            timeout = max(self._settings.startup, timeout)
+            self._started = True
+        with trio.move_on_after(timeout):
+            while not all(
+                    _.started.is_set() or _.ended.is_set()
+                    for _ in self._inputs
+            ):
+                await self._changed.park()
+            while not self._is_ready(nbytes):
+                await self._changed.park()
+
+        # Wait for at least one whole frame to mix.
+        while True:
+            available = max(len(mixed.buffer) for mixed in self._inputs)
+            if available >= frame_size:
+                break
+            if all(mixed.ended.is_set() for mixed in self._inputs):
+                return b''
+            await self._changed.park()
+
+        # Mix whole frames, padding short sources with silence.
+        nbytes = min(nbytes, available - available % frame_size)
+        total = numpy.zeros(nbytes // 2, dtype=numpy.float32)
+        for mixed, gain in zip(self._inputs, self._gains):
+            size = min(nbytes, len(mixed.buffer))
+            size -= size % frame_size
+            if not size:
+                continue
+            samples = numpy.frombuffer(
+                mixed.buffer, dtype='<i2', count=size // 2
+            )
+            if gain == 1.0:
+                total[:size // 2] += samples
+            else:
+                total[:size // 2] += samples * numpy.float32(gain)
+            del samples
+            del mixed.buffer[:size]
+        self._drained.unpark_all()
+        return to_bytes(total)
@@ -0,0 +1,106 @@
+"""Output class."""
+import io
+import logging
+import mmap
+import os
+import tempfile
+
+LOG = logging.getLogger(__name__)
+
+
+class Output:
+    """Bytes collected from a stream in linear time.
+
+    With `spill_at` set, the bytes move to an anonymous temporary file
+    in `spill_dir` once there are more than `spill_at` of them.
+
+    """
+
+    def __init__(self, spill_at=None, spill_dir=None):
+        """Start with nothing."""
+        self._buffer = bytearray()
+        self._file = None
+        self._size = 0
+        self._spill_at = spill_at
+        self._spill_dir = spill_dir
+
+    def __len__(self):
+        """Return the number of bytes collected."""
+        return self._size
+
+    def __bool__(self):
+        """Return whether anything was collected."""
+        return self._size > 0
+
+    @property
+    def spill_at(self):
+        """Return the size past which the data moves to a file, or None."""
+        return self._spill_at
+
+    @property
+    def spilled(self):
+        """Return whether the data lives in a file."""
+        return self._file is not None
+
+    def write(self, chunk):
+        """Append a chunk of data."""
+        self._size += len(chunk)
+        if self._file:
+            self._file.write(chunk)
+        else:
+            self._buffer += chunk
+            if self._spill_at is not None and self._size > self._spill_at:
+                self._spill()
+
+    def _spill(self):
+        """Move the data to a temporary file."""
+        LOG.debug('spill %d bytes to %s', self._size, self._spill_dir)
+        self._file = tempfile.TemporaryFile(
+            dir=None if self._spill_dir is None else str(self._spill_dir)
+        )
+        self._file.write(self._buffer)
+        self._buffer = bytearray()
+
+    def getbuffer(self):
+        """Return a `memoryview` of the data without copying it.
+
+        Spilled data is mapped from its file.  Release the view before
+        writing more data.
+
+        """
+        if self._file:
+            self._file.flush()
+            return memoryview(mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            ))
+        return memoryview(self._buffer)
+
+    def getvalue(self):
+        """Return the data as `bytes`."""
+        if self._file:
+            with self.open() as output:
+                return output.read()
+        return bytes(self._buffer)
+
+    def decode(self, encoding='utf-8', errors='strict'):
+        """Return the data as `str`."""
+        if self._file:
+            return self.getvalue().decode(encoding, errors)
+        return self._buffer.decode(encoding, errors)
+
+    def open(self):
+        """Return a binary file object for reading the data."""
+        if self._file:
+            self._file.flush()
+            output = os.fdopen(os.dup(self._file.fileno()), 'rb')
+            output.seek(0)
+            return output
+        return io.BytesIO(self._buffer)
+
+    def close(self):
+        """Discard the data."""
+        if self._file:
+            self._file.close()
+            self._file = None
+        self._buffer = bytearray()
+        self._size = 0
@@ -0,0 +1,130 @@
+"""Pacer class."""
+import logging
+
+import trio
+
+from ._chunk import ChunkSize
+from ._pcm import FRAME_SIZE, RATE
+from ._streamer import Streamer
+from ._transport import Transport
+
+LOG = logging.getLogger(__name__)
+
+
+class Clock:
+    """When each byte of a stream is due, on a clock started by the first.
+
+    Bytes may leave up to `burst` seconds early, and if they fall more
+    than `max_lag` seconds behind the clock starts over.
+
+    """
+
+    def __init__(self, bytes_per_second, burst, max_lag):
+        """Let `bytes_per_second` through."""
+        self._start = None
+        self.burst = burst
+        self.bytes_per_second = bytes_per_second
+        self.max_lag = max_lag
+        self.resyncs = 0
+        self.sent = 0
+
+    @property
+    def position(self):
+        """Return the seconds of audio let through so far."""
+        return self.sent / self.bytes_per_second
+
+    async def pace(self, nbytes):
+        """Wait until `nbytes` more bytes are due."""
+        now = trio.current_time()
+        if self._start is None:
+            self._start = now
+        due = self._start + self.position
+        if now - due > self.max_lag:
+            LOG.debug('pacer %.3fs behind, starting over', now - due)
+            self._start = now - self.position
+            self.resyncs += 1
+        elif due - self.burst > now:
+            await trio.sleep_until(due - self.burst)
+        self.sent += nbytes
+
+
+class Pacer(trio.abc.AsyncResource, Streamer):
+    """Let s16le audio through no faster than it plays.
+
+    Every chunk is due at the time its first frame would play on a
+    clock started by the first chunk, so sleeps never add up to drift.
+    Chunks may leave up to `burst` seconds early to fill the buffers
+    downstream.  If the input falls more than `max_lag` seconds behind,
+    the clock starts over instead of rushing to catch up.  Put one pacer
+    upstream of a :class:`Tee` so every output shares the same clock.
+
+    """
+
+    def __init__(self, rate=RATE, frame_size=FRAME_SIZE, burst=0.25,
+                 max_lag=1.0):
+        """Pace `rate` frames of `frame_size` bytes per second."""
+        self._chunk_size = ChunkSize(16384, frame=frame_size)
+        self._clock = Clock(rate * frame_size, burst, max_lag)
+        self._pending = b''
+        self._send_ch, self._receive_ch = trio.open_memory_channel(0)
+
+    def __repr__(self):
+        """Represent prettily."""
+        clock = self._clock
+        return (f'Pacer({clock.bytes_per_second} B/s, '
+                f'burst={clock.burst}, max_lag={clock.max_lag})')
+
+    def __or__(self, next_one):
+        """Combine with the next one as a transport."""
+        return Transport(self, next_one)
+
+    def __rshift__(self, next_one):
+        """Combine with the next one as a transport."""
+        return Transport(self, next_one)
+
+    @property
+    def position(self):
+        """Return the seconds of audio let through so far."""
+        return self._clock.position
+
+    @property
+    def resyncs(self):
+        """Return how many times the clock started over."""
+        return self._clock.resyncs
+
+    async def aclose(self):
+        """Close both ends."""
+        await self._send_ch.aclose()
+        await self._receive_ch.aclose()
+
+    def start(self, nursery, stdin=None):
+        """Start with `stdin` as the only input, if given."""
+        if stdin:
+            nursery.start_soon(self._send_and_close, stdin)
+
+    async def _send_and_close(self, chunk):
+        """Send one chunk and end the input."""
+        async with self._send_ch:
+            await self._send_ch.send(chunk)
+
+    async def send_all(self, chunk):
+        """Send a chunk of data to the input of this stream."""
+        await self._send_ch.send(chunk)
+
+    async def receive_from_channel(self, channel):
+        """Take the input from `channel` and end with it."""
+        async with channel, self._send_ch:
+            async for chunk in channel:
+                await self._send_ch.send(chunk)
+
+    async def receive_some(self, max_bytes):
+        """Return a chunk of the input once it is due."""
+        if not self._pending:
+            try:
+                self._pending = await self._receive_ch.receive()
+            except (trio.EndOfChannel, trio.ClosedResourceError):
+                return b''
+        chunk = self._pending[:max_bytes]
+        self._pending = self._pending[max_bytes:]
+        await self._clock.pace(len(chunk))
+        return chunk
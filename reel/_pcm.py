@@ -0,0 +1,129 @@
+"""Helpers for raw s16le audio."""
+import logging
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # pylint: disable=invalid-name
+
+LOG = logging.getLogger(__name__)
+
+RATE = 44100
+CHANNELS = 2
+SAMPLE_WIDTH = 2
+FRAME_SIZE = CHANNELS * SAMPLE_WIDTH
+BYTES_PER_SECOND = RATE * FRAME_SIZE
+
+
+def require_numpy():
+    """Return the numpy module or explain how to install it."""
+    if numpy is None:
+        raise ImportError(
+            'in-process audio needs numpy, install it with: '
+            'pip install reel[dsp]'
+        )
+    return numpy
+
+
+def align(carry, chunk, frame_size=FRAME_SIZE):
+    """Return the whole frames of `carry` + `chunk` and the bytes left over.
+
+    An aligned chunk with nothing carried comes back as is, without a
+    copy, and a memoryview is only sliced.  The carry is always shorter
+    than one frame.
+
+    """
+    if not carry:
+        extra = len(chunk) % frame_size
+        if not extra:
+            return chunk, b''
+        usable = len(chunk) - extra
+        return chunk[:usable], bytes(chunk[usable:])
+    need = frame_size - len(carry)
+    if len(chunk) < need:
+        return b'', carry + bytes(chunk)
+    rest = len(chunk) - need
+    usable = need + rest - rest % frame_size
+    return carry + bytes(chunk[:usable]), bytes(chunk[usable:])
+
+
+class Aligner:
+    """Cut a stream into whole frames, carrying partial ones over."""
+
+    def __init__(self, frame_size=FRAME_SIZE):
+        """Align to frames of `frame_size` bytes."""
+        self._carry = b''
+        self.frame_size = frame_size
+
+    def align(self, chunk):
+        """Return the whole frames of what was carried and `chunk`."""
+        data, self._carry = align(self._carry, chunk, self.frame_size)
+        return data
+
+    def drop(self):
+        """Drop the partial frame left at the end of a stream."""
+        if self._carry:
+            LOG.debug('dropping %d bytes of a partial frame', len(self._carry))
+            self._carry = b''
+
+
+def to_samples(data):
+    """Return a read-only int16 view of the s16le bytes in `data`."""
+    return require_numpy().frombuffer(data, dtype='<i2')
+
+
+def to_bytes(samples):
+    """Saturate `samples` to the int16 range and return s16le bytes."""
+    np = require_numpy()
+    if samples.dtype != np.int16:
+        samples = np.clip(samples, -32768, 32767)
+        if samples.dtype.kind == 'f':
+            samples = np.rint(samples, out=samples)
+    return samples.astype('<i2', copy=False).tobytes()
+
+
+CURVES = ('linear', 'equal_power')
+
+_CURVE_CACHE = {}
+
+
+def fade_curve(frames, curve='equal_power'):
+    """Return the fade-in gains for `frames` frames, shaped for stereo.
+
+    The matching fade-out is the same curve reversed.
+
+    """
+    key = (frames, curve)
+    if key not in _CURVE_CACHE:
+        if len(_CURVE_CACHE) > 32:
+            _CURVE_CACHE.clear()
+        np = require_numpy()
+        position = (np.arange(frames, dtype=np.float32) + 0.5) / frames
+        if curve == 'linear':
+            gains = position
+        elif curve == 'equal_power':
+            gains = np.sin(position * np.float32(np.pi / 2))
+        else:
+            raise ValueError(f'unknown fade curve {curve!r}')
+        _CURVE_CACHE[key] = gains.astype(np.float32)[:, None]
+    return _CURVE_CACHE[key]
+
+
+def crossfade(tail, head, curve='equal_power'):
+    """Blend the end of one s16le stereo stream into the start of another.
+
+    `head` is padded with silence if it is shorter than `tail`.
+
+    """
+    np = require_numpy()
+    frames = len(tail) // FRAME_SIZE
+    if not frames:
+        return b''
+    fading_out = to_samples(tail[:frames * FRAME_SIZE]).reshape(-1, CHANNELS)
+    fading_in = np.zeros((frames, CHANNELS), dtype=np.float32)
+    head_frames = min(len(head) // FRAME_SIZE, frames)
+    fading_in[:head_frames] = to_samples(
+        head[:head_frames * FRAME_SIZE]
+    ).reshape(-1, CHANNELS)
+    gains = fade_curve(frames, curve)
+    return to_bytes(fading_out * gains[::-1] + fading_in * gains)
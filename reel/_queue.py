@@ -0,0 +1,163 @@
+"""PlayQueue class."""
+import heapq
+import itertools
+import logging
+import random
+
+LOG = logging.getLogger(__name__)
+
+_REMOVED = object()
+
+
+class PlayQueue:
+    """A queue of tracks that can change while a reel plays it.
+
+    Tracks with a higher priority play first, and tracks with the same
+    priority play in the order they were queued.  Queueing, bumping and
+    removing a track take O(log n) time.  A reel built from a queue
+    follows each change with the tracks it has on deck.
+
+    """
+
+    def __init__(self, tracks=()):
+        """Queue `tracks` in order."""
+        self._back = itertools.count()
+        self._entries = {}
+        self._front = itertools.count(-1, -1)
+        self._heap = []
+        self._listeners = []
+        for track in tracks:
+            self.append(track)
+
+    def __len__(self):
+        """Return the number of tracks queued."""
+        return len(self._entries)
+
+    def __bool__(self):
+        """Return whether any tracks are queued."""
+        return bool(self._entries)
+
+    def __contains__(self, track):
+        """Return whether `track` is queued."""
+        return track in self._entries
+
+    def __iter__(self):
+        """Iterate over the queued tracks in play order."""
+        for entry in sorted(self._entries.values()):
+            yield entry[-1]
+
+    def __repr__(self):
+        """Represent prettily."""
+        return f'PlayQueue({list(self)!r})'
+
+    def subscribe(self, callback):
+        """Call `callback` with no arguments after each change."""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        """Stop calling `callback`."""
+        self._listeners.remove(callback)
+
+    def _changed(self):
+        """Tell the listeners about a change."""
+        for callback in list(self._listeners):
+            callback()
+
+    def _push(self, track, priority, seq):
+        """Add an entry for `track`, replacing any old one."""
+        if track in self._entries:
+            self._entries.pop(track)[-1] = _REMOVED
+        entry = [-priority, seq, track]
+        self._entries[track] = entry
+        heapq.heappush(self._heap, entry)
+        self._compact()
+
+    def _compact(self):
+        """Drop removed entries once they outnumber the live ones."""
+        if len(self._heap) > 2 * len(self._entries) + 16:
+            self._heap = list(self._entries.values())
+            heapq.heapify(self._heap)
+
+    def _top(self):
+        """Return the first live entry, or None."""
+        while self._heap and self._heap[0][-1] is _REMOVED:
+            heapq.heappop(self._heap)
+        if self._heap:
+            return self._heap[0]
+        return None
+
+    def priority(self, track):
+        """Return the priority of a queued `track`."""
+        return -self._entries[track][0]
+
+    def append(self, track, priority=0):
+        """Queue `track` after the others with the same priority."""
+        self._push(track, priority, next(self._back))
+        self._changed()
+        return self
+
+    def insert_next(self, track):
+        """Queue `track` to play before all of the others."""
+        top = self._top()
+        priority = -top[0] if top else 0
+        self._push(track, priority, next(self._front))
+        self._changed()
+        return self
+
+    def bump(self, track, priority):
+        """Move a queued `track` to the back of `priority`."""
+        if track not in self._entries:
+            raise KeyError(track)
+        self._push(track, priority, next(self._back))
+        self._changed()
+        return self
+
+    def remove(self, track):
+        """Take `track` out of the queue."""
+        self._entries.pop(track)[-1] = _REMOVED
+        self._compact()
+        self._changed()
+        return self
+
+    def shuffle(self, rand=random):
+        """Play the tracks of each priority in a random order."""
+        entries = list(self._entries.values())
+        order = [entry[1] for entry in entries]
+        rand.shuffle(order)
+        for entry, seq in zip(entries, order):
+            entry[1] = seq
+        self._heap = entries
+        heapq.heapify(self._heap)
+        self._changed()
+        return self
+
+    def peek(self):
+        """Return the track that plays next, or None."""
+        top = self._top()
+        if top:
+            return top[-1]
+        return None
+
+    def pop(self):
+        """Take the track that plays next out of the queue, or None."""
+        top = self._top()
+        if not top:
+            return None
+        heapq.heappop(self._heap)
+        del self._entries[top[-1]]
+        return top[-1]
+
+    def head(self, count):
+        """Return the next `count` tracks in play order."""
+        result = []
+        candidates = []
+        if self._heap:
+            candidates.append((self._heap[0], 0))
+        while candidates and len(result) < count:
+            entry, idx = heapq.heappop(candidates)
+            if entry[-1] is not _REMOVED:
+                result.append(entry[-1])
+            for child in (2 * idx + 1, 2 * idx + 2):
+                if child < len(self._heap):
+                    heapq.heappush(candidates, (self._heap[child], child))
+        return result
@@ -0,0 +1,174 @@
+"""Read-ahead buffers for the upcoming tracks of a reel."""
+from collections import deque
+import logging
+
+import trio
+
+LOG = logging.getLogger(__name__)
+
+
+class Budget:
+    """A hard cap on the bytes held by a group of read-ahead buffers."""
+
+    def __init__(self, max_bytes):
+        """Allow up to `max_bytes` in total."""
+        self.max_bytes = max_bytes
+        self.used = 0
+        self._freed = trio.hazmat.ParkingLot()
+
+    async def reserve(self, nbytes):
+        """Wait until `nbytes` fit under the cap and claim them."""
+        while self.used and self.used + nbytes > self.max_bytes:
+            await self._freed.park()
+        self.used += nbytes
+
+    def release(self, nbytes):
+        """Give back `nbytes`."""
+        self.used -= nbytes
+        self._freed.unpark_all()
+
+
+class _Buffer:
+    """The chunks of one track read ahead, up to `max_bytes` of them."""
+
+    def __init__(self, max_bytes):
+        """Start empty."""
+        self._chunks = deque()
+        self.ended = False
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+
+    def __bool__(self):
+        """Return whether there is anything to play."""
+        return bool(self._chunks)
+
+    @property
+    def full(self):
+        """Return whether the buffer holds all it may."""
+        return self.nbytes >= self.max_bytes
+
+    def put(self, chunk):
+        """Append a chunk."""
+        self._chunks.append(chunk)
+        self.nbytes += len(chunk)
+
+    def take(self, max_bytes):
+        """Return up to `max_bytes` from the oldest chunk."""
+        chunk = self._chunks.popleft()
+        if len(chunk) > max_bytes:
+            self._chunks.appendleft(chunk[max_bytes:])
+            chunk = chunk[:max_bytes]
+        self.nbytes -= len(chunk)
+        return chunk
+
+    def clear(self):
+        """Drop every chunk and return how many bytes they held."""
+        nbytes, self.nbytes = self.nbytes, 0
+        self._chunks.clear()
+        return nbytes
+
+
+class ReadAhead:
+    """Drain a started track into memory before it is needed.
+
+    Once the track is playing, :meth:`receive_some` stops the draining
+    and serves the buffer before reading the track directly.
+
+    """
+
+    def __init__(self, track, budget, max_bytes, chunk_size):
+        """Buffer up to `max_bytes` of `track`, counted against `budget`."""
+        self._budget = budget
+        self._buffer = _Buffer(max_bytes)
+        self._cancel_scope = trio.CancelScope()
+        self._changed = trio.hazmat.ParkingLot()
+        self._chunk_size = chunk_size
+        self._stopped = trio.Event()
+        self.track = track
+
+    @property
+    def buffered(self):
+        """Return the number of bytes waiting to be played."""
+        return self._buffer.nbytes
+
+    async def drain(self):
+        """Read the track into the buffer until it ends or is stopped."""
+        with self._cancel_scope:
+            while True:
+                while self._buffer.full:
+                    await self._changed.park()
+                size = self._chunk_size.size
+                await self._budget.reserve(size)
+                try:
+                    chunk = await self.track.receive_some(size)
+                except BaseException:
+                    self._budget.release(size)
+                    raise
+                chunk = chunk or b''
+                self._budget.release(size - len(chunk))
+                if not chunk:
+                    self._buffer.ended = True
+                    break
+                self._buffer.put(chunk)
+                self._changed.unpark_all()
+        self._stopped.set()
+        self._changed.unpark_all()
+
+    async def stop(self):
+        """Stop draining and wait for the drain to let go of the track."""
+        self._cancel_scope.cancel()
+        await self._stopped.wait()
+
+    async def receive_some(self, max_bytes):
+        """Return buffered data, then data read from the track."""
+        if not self._cancel_scope.cancel_called:
+            await self.stop()
+        if not self._buffer:
+            if self._buffer.ended:
+                return b''
+            return await self.track.receive_some(max_bytes)
+        chunk = self._buffer.take(max_bytes)
+        self._budget.release(len(chunk))
+        self._changed.unpark_all()
+        return chunk
+
+    def close(self):
+        """Stop draining and free the buffer."""
+        self._cancel_scope.cancel()
+        self._budget.release(self._buffer.clear())
+        self._buffer.ended = True
+        self._changed.unpark_all()
+
+
+class ReadAheads:
+    """The read-ahead buffers of the upcoming tracks of a reel."""
+
+    def __init__(self, max_bytes, budget):
+        """Buffer up to `max_bytes` of each track, all within `budget`."""
+        self._budget = budget
+        self._buffers = {}
+        self._max_bytes = max_bytes
+
+    def add(self, track, nursery, chunk_size):
+        """Start draining a started `track` in `nursery`."""
+        read_ahead = ReadAhead(
+            track, self._budget, self._max_bytes, chunk_size
+        )
+        self._buffers[track] = read_ahead
+        nursery.start_soon(read_ahead.drain)
+
+    def source(self, track):
+        """Return what to read `track` from, its buffer if it has one."""
+        return self._buffers.get(track, track)
+
+    def close(self, track):
+        """Free the buffer of `track`, if it has one."""
+        read_ahead = self._buffers.pop(track, None)
+        if read_ahead:
+            read_ahead.close()
+
+    def close_all(self):
+        """Free every buffer."""
+        for read_ahead in self._buffers.values():
+            read_ahead.close()
+        self._buffers.clear()
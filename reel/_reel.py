@@ -3,6 +3,14 @@ import logging
 
 import trio
 
+from ._bus import Announcer
+from ._chunk import ChunkSize
+from ._crossfade import Crossfade
+from ._deck import Deck
+from ._lookahead import Lookahead
+from ._pcm import BYTES_PER_SECOND, FRAME_SIZE, Aligner, require_numpy
+from ._readahead import Budget, ReadAheads
+from ._relay import write_all
 from ._streamer import Streamer
 from ._transport import Transport
 
@@ -10,17 +18,30 @@ LOG = logging.getLogger(__name__)
 
 
 class Reel(trio.abc.AsyncResource, Streamer):
-    """A stack of spools concatenated in place as one spool in a transport."""
+    """A stack of spools concatenated in place as one spool in a transport.
+
+    The tracks can be a list, or any iterator, async iterator or async
+    generator, which is only pulled as far as the tracks on deck.  A
+    :class:`PlayQueue` can be changed while the reel plays it.
+
+    The first track and each track change are announced to a
+    synchronous `announce_to` callback in line, and to subscribers of
+    the announcement :attr:`bus`, including `announce_to_async`, in
+    tasks of their own so they never hold up the stream.
+
+    """
 
     def __init__(self, tracks, announce_to=None, a_announce_to=None):
-        """Begin as a list of tracks."""
-        self._a_announce = a_announce_to
-        self._announce = announce_to
-        self._current_track = None
-        self._next_track = None
-        self._nursery = None
-        self._stdin = None
-        self._tracks = tracks
+        """Begin as a list or iterator of tracks."""
+        self._announcer = Announcer(announce_to)
+        self._chunk_size = ChunkSize()
+        self._crossfade = None
+        self._framing = None
+        self._lookahead = None
+        self._read_aheads = None
+        self._deck = Deck(tracks)
+        if a_announce_to:
+            self._announcer.async_callback = a_announce_to
 
     def __str__(self):
         """Print the command."""
@@ -29,9 +50,11 @@ class Reel(trio.abc.AsyncResource, Streamer):
     def __repr__(self):
         """Represent prettily."""
         result = 'Reel([ '
-        for track in self._tracks:
+        for track in self.tracks:
             result += track.__repr__()
             result += ','
+        if self._deck.source.sequence is None:
+            result += ' ...'
         result += ' ])'
         return result
 
@@ -45,122 +68,238 @@ class Reel(trio.abc.AsyncResource, Streamer):
 
     async def aclose(self):
         """Close the spools."""
-        for track in self._tracks:
-            await track.aclose()
+        if self._read_aheads:
+            self._read_aheads.close_all()
+        queue = self._deck.source.queue
+        if queue is not None and self._deck.nursery is not None:
+            queue.unsubscribe(self._reschedule)
+            self._deck.nursery = None
+        decoding = self._lookahead.decoding if self._lookahead else ()
+        await self._deck.aclose(decoding)
+        await self._end()
+
+    def crossfade(self, seconds=2.0, curve='equal_power'):
+        """Blend each track into the next over `seconds` of s16le stereo.
+
+        The last `seconds` of the playing track are held back and mixed
+        with the start of the next track on the `curve`, either
+        ``'linear'`` or ``'equal_power'``.
+
+        """
+        require_numpy()
+        self._crossfade = Crossfade(seconds, curve)
+        return self
 
     @property
     def announce_to(self):
         """Return the next track on deck."""
-        return self._announce
+        return self._announcer.callback
 
     @announce_to.setter
     def announce_to(self, value):
         """Set the announce_to callback."""
-        self._announce = value
+        self._announcer.callback = value
 
     @property
     def announce_to_async(self):
         """Return the next track on deck."""
-        return self._a_announce
+        return self._announcer.async_callback
 
     @announce_to_async.setter
     def announce_to_async(self, value):
         """Set the announce_to callback."""
-        self._a_announce = value
+        self._announcer.async_callback = value
+
+    @property
+    def bus(self):
+        """Return the :class:`Bus` that announces each track change.
+
+        Its subscribers, sync or async, each run in a task of their own
+        and never hold up the stream.
+
+        """
+        return self._announcer.bus
+
+    def framing(self, frame_size=FRAME_SIZE):
+        """Play only whole frames of `frame_size` bytes from each track.
+
+        A track that ends in the middle of a frame would shift every
+        track after it by a few bytes, so its partial last frame is
+        dropped.
+
+        """
+        self._framing = Aligner(frame_size)
+        return self
+
+    def read_ahead(self, tracks=1, seconds=30.0, max_bytes=64 * 1024**2):
+        """Drain the next `tracks` tracks into memory while playing.
+
+        Each upcoming track is read ahead by up to `seconds` of s16le
+        stereo, and all of the buffers together never hold more than
+        `max_bytes`.
+
+        """
+        self._deck.depth = max(tracks, 1)
+        self._read_aheads = ReadAheads(
+            int(seconds * BYTES_PER_SECOND), Budget(max_bytes)
+        )
+        return self
+
+    def lookahead(self, tracks=2, workers=None):
+        """Decode the `tracks` after the ones on deck ahead of time.
+
+        Tracks that can decode into a cache, like ``ffmpeg.read(uri,
+        cache=...)``, are decoded nearest first, at most `workers` at a
+        time, by default one less than the number of cores to leave one
+        for playback.
+
+        """
+        self._lookahead = Lookahead(tracks, workers)
+        return self
 
     @property
     def next_track(self):
         """Return the next track on deck."""
-        if self._next_track:
-            return self.tracks[self._next_track]
-        return None
+        return self._deck.next_track
 
     @property
     def current_track(self):
         """Return the currently playing track."""
-        if self._current_track is not None:
-            return self._tracks[self._current_track]
-        return None
+        return self._deck.current
 
     @property
     def tracks(self):
-        """Return the list of tracks."""
-        return self._tracks
+        """Return the list of tracks, or the ones on deck if lazy."""
+        return self._deck.tracks
 
     @property
     def spools(self):
         """Return the list of spools."""
-        return self._tracks
+        return self.tracks
 
     def start(self, nursery, stdin=None):
         """Store information for send to use."""
-        LOG.debug('[ START REEL %d ]', len(self._tracks))
-        self._nursery = nursery
-        self._stdin = stdin
+        LOG.debug('[ START REEL %s ]', str(self))
+        self._deck.start(nursery, stdin)
+        self._announcer.bus.start(nursery)
+        if self._lookahead:
+            self._lookahead.start(nursery)
+        if self._deck.source.queue is not None:
+            self._deck.source.queue.subscribe(self._reschedule)
+
+        # An async source is pulled when the reel is first played.
+        if not self._deck.source.is_async:
+            self._start_next_track()
+
+    async def _advance(self):
+        """Pull what the next track change needs, then change tracks."""
+        if self._deck.source.is_async:
+            extra = self._lookahead.tracks if self._lookahead else 0
+            await self._deck.source.fill(self._deck.needed(extra))
         self._start_next_track()
 
+    async def _begin(self):
+        """Pull the first tracks of an async source and announce them."""
+        if self._deck.source.is_async and self.current_track is None:
+            await self._advance()
+        if self.current_track is not None:
+            self._announcer.announce_first(self.current_track)
+
+    def _prefetch(self, track):
+        """Start a track, and drain it ahead of time if configured."""
+        self._deck.start_track(track)
+        if self._read_aheads:
+            self._read_aheads.add(
+                track, self._deck.nursery, self._chunk_size
+            )
+
     def _start_next_track(self):
         """Set the current/next track so send has something to send."""
+        if self._framing:
+            self._framing.drop()
         LOG.debug(
-            '[ REEL %d START NEXT_TRACK %s %s ]',
-            len(self._tracks),
-            str(self._current_track),
-            str(self._next_track)
+            '[ REEL START NEXT_TRACK %s %s ]',
+            str(self.current_track),
+            str(self.next_track)
         )
-
-        # Start at the beginning without a current track.
-        if not self.current_track:
-            if self._tracks:
-                self._current_track = 0
-                if len(self._tracks) > 1:
-                    self._next_track = 1
-            self.current_track.start(self._nursery, self._stdin)
-        else:
-            _next = None
-            if self._next_track:
-                _next = self._next_track + 1
-            self._current_track = self._next_track
-            if _next and _next < len(self._tracks):
-                self._next_track = _next
-            else:
-                self._next_track = None
-
-        # Prefetch next track by starting it.
-        if self.next_track:
-            self.next_track.start(self._nursery, self._stdin)
-
+        self._deck.change(self._prefetch, self._close_track)
+        self._schedule_lookahead()
         LOG.debug(
-            '[ REEL %d STARTED NEXT_TRACK %s %s ]',
-            len(self._tracks),
-            str(self._current_track),
-            str(self._next_track)
+            '[ REEL STARTED NEXT_TRACK %s %s ]',
+            str(self.current_track),
+            str(self.next_track)
+        )
+
+    def _reschedule(self):
+        """Keep the tracks on deck in step with the queue."""
+        self._deck.reschedule(self._prefetch, self._close_track)
+        self._schedule_lookahead()
+
+    def _schedule_lookahead(self):
+        """Decode the tracks after the ones on deck in the background."""
+        if not self._lookahead or self.current_track is None:
+            return
+        self._lookahead.schedule(
+            self._deck.ahead(self._lookahead.tracks), self._deck.started
         )
 
+    async def _end(self):
+        """Let the subscribers and decode workers finish."""
+        await self._announcer.bus.aclose()
+        if self._lookahead:
+            await self._lookahead.aclose()
+
+    async def _receive_from_current(self, max_bytes):
+        """Return a chunk of the current track, buffered or not."""
+        source = self.current_track
+        if self._read_aheads:
+            source = self._read_aheads.source(source)
+        if not self._framing:
+            return await source.receive_some(max_bytes)
+        while True:
+            chunk = await source.receive_some(max_bytes)
+            if not chunk:
+                self._framing.drop()
+                return chunk
+            chunk = self._framing.align(chunk)
+            if chunk:
+                return chunk
+
+    async def _close_track(self, track):
+        """Free the buffer of a track and close it."""
+        if self._lookahead:
+            self._lookahead.discard(track)
+        self._deck.started.discard(track)
+        if self._read_aheads:
+            self._read_aheads.close(track)
+        await track.aclose()
+
+    async def _announce_current_track(self):
+        """Tell the listeners which track is playing."""
+        self._announcer.announce(self.current_track)
+
     async def skip_to_next_track(self, close=True):
         """Begin playing the next track immediately."""
         LOG.debug(
-            '[ REEL %d SKIP_TO_NEXT_TRACK %s %s ]',
-            len(self._tracks),
-            self._current_track,
-            self._next_track
+            '[ REEL SKIP_TO_NEXT_TRACK %s %s ]',
+            str(self.current_track),
+            str(self.next_track)
         )
         if close:
-            await self.current_track.aclose()
+            await self._close_track(self.current_track)
 
         if self.next_track:
-            self._start_next_track()
+            await self._advance()
 
             # Announce the track change.
-            if self._announce:
-                self._announce(self.current_track)
-            elif self._a_announce:
-                await self._a_announce(self.current_track)
+            await self._announce_current_track()
 
     async def receive_from_channel(self, channel):
         """Receive input and send it to the current spool."""
+        await self._begin()
         LOG.debug(
             '[ REEL track[%s] receive_from_channel() ]',
-            str(self._current_track)
+            str(self.current_track)
         )
         async with channel:
             async for chunk in channel:
@@ -170,54 +309,135 @@ class Reel(trio.abc.AsyncResource, Streamer):
         """Receive input and send it to the current spool."""
         LOG.debug(
             '[ REEL track[%s] send_all !! len %d ]',
-            str(self._current_track),
+            str(self.current_track),
             len(chunk)
         )
+        await self._begin()
         if self.current_track:  # race??  next line could be error?
             await self.current_track.send_all(chunk)
 
     async def receive_some(self, max_bytes):
         """Return a chunk of data from the output of this stream."""
+        await self._begin()
+        if self._crossfade:
+            chunk = await self._receive_crossfaded(max_bytes)
+            if not chunk:
+                await self._end()
+            return chunk
         if self.current_track:
 
             # Return a chunk of data from the current track.
-            chunk = await self.current_track.receive_some(max_bytes)
+            chunk = await self._receive_from_current(max_bytes)
             if chunk:
                 return chunk
 
             # No data, close the track and start the next one.
-            await self.current_track.proc.aclose()
+            await self._close_track(self.current_track)
             if self.next_track:
-                self._start_next_track()
+                await self._advance()
 
                 # Announce the track change.
-                if self._announce:
-                    self._announce(self.current_track)
-                elif self._a_announce:
-                    await self._a_announce(self.current_track)
+                await self._announce_current_track()
 
                 # Return a chunk of data from the new track.
                 return await self.receive_some(max_bytes)
 
         # Send empty byte as EOF.
+        await self._end()
         return b''
 
+    async def receive_into(self, buffer):
+        """Read the current track into `buffer`, changing tracks at the end."""
+        if self._crossfade or self._read_aheads or self._framing:
+            return await super().receive_into(buffer)
+        await self._begin()
+        while self.current_track:
+            count = await self.current_track.receive_into(buffer)
+            if count:
+                return count
+
+            # No data, close the track and start the next one.
+            await self._close_track(self.current_track)
+            if not self.next_track:
+                break
+            await self._advance()
+            await self._announce_current_track()
+        await self._end()
+        return 0
+
+    async def _receive_crossfaded(self, max_bytes):
+        """Return a chunk of data, blending the tracks where they meet."""
+        while self.current_track:
+
+            # Hold back the last part of the track for the fade.
+            chunk = await self._receive_from_current(max_bytes)
+            if chunk:
+                chunk = self._crossfade.hold(chunk)
+                if chunk:
+                    return chunk
+                continue
+
+            # No data, close the track and fade into the next one.
+            await self._close_track(self.current_track)
+            if not self.next_track:
+                break
+            tail = self._crossfade.tail()
+            await self._advance()
+            await self._announce_current_track()
+            head = bytearray()
+            while len(head) < len(tail):
+                chunk = await self._receive_from_current(
+                    max(len(tail) - len(head), FRAME_SIZE)
+                )
+                if not chunk:
+                    break
+                head += chunk
+            blended = self._crossfade.blend(tail, head)
+            if blended:
+                return blended
+
+        # Flush whatever is left of the last track.
+        return self._crossfade.flush()
+
     async def send_to_channel(self, channel):
         """Start each spool and send stdout to the `channel`."""
+        await self._begin()
         async with channel:
             while self.current_track:
 
-                # Announce the track change.
-                if self._announce:
-                    self._announce(self.current_track)
-                elif self._a_announce:
-                    await self._a_announce(self.current_track)
-
                 # Play the track.
                 while True:
-                    chunk = await self.receive_some(16384)
+                    chunk = await self.receive_some(self._chunk_size.size)
                     if chunk:
+                        self._chunk_size.update(len(chunk))
                         await channel.send(chunk)
                     else:
                         break
-                self._start_next_track()
+                await self._advance()
+        await self._end()
+
+    async def send_to_fd(self, fd):
+        """Relay each track straight to the file descriptor `fd`."""
+        await self._begin()
+        if self._crossfade or self._read_aheads or self._framing:
+
+            # Crossfades, read-ahead and framing need the bytes in python.
+            while True:
+                chunk = await self.receive_some(self._chunk_size.size)
+                if not chunk:
+                    break
+                await write_all(fd, chunk)
+            await self._end()
+            return
+
+        while self.current_track:
+
+            # Play the track.
+            self.current_track.chunk_size = self._chunk_size.copy()
+            await self.current_track.send_to_fd(fd)
+            await self._advance()
+
+            # Announce the track change.
+            if self.current_track:
+                await self._announce_current_track()
+        await self._end()
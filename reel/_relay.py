@@ -0,0 +1,427 @@
+"""Relay class."""
+import abc
+import errno
+import logging
+import os
+import sys
+
+import trio
+
+from ._chunk import ChunkSize
+
+if sys.platform.startswith('linux'):
+    import fcntl
+else:
+    fcntl = None  # pylint: disable=invalid-name
+
+LOG = logging.getLogger(__name__)
+
+_F_SETPIPE_SZ = getattr(fcntl, 'F_SETPIPE_SZ', 1031)
+_F_GETPIPE_SZ = getattr(fcntl, 'F_GETPIPE_SZ', 1032)
+_PIPE_MAX_SIZE = '/proc/sys/fs/pipe-max-size'
+
+_SPLICE_FLAGS = (
+    getattr(os, 'SPLICE_F_MOVE', 0) | getattr(os, 'SPLICE_F_NONBLOCK', 0)
+)
+
+
+def get_pipe_size(fd):
+    """Return the capacity of the pipe `fd`, or None if unknown."""
+    if fcntl is None:
+        return None
+    try:
+        return fcntl.fcntl(fd, _F_GETPIPE_SZ)
+    except OSError as error:
+        LOG.debug(error)
+        return None
+
+
+def set_pipe_size(fd, nbytes):
+    """Grow the pipe `fd` toward `nbytes` and return its new capacity.
+
+    The request is capped at the system maximum for unprivileged users.
+
+    """
+    if fcntl is None:
+        return None
+    try:
+        with open(_PIPE_MAX_SIZE, encoding='ascii') as max_size:
+            nbytes = min(nbytes, int(max_size.read()))
+    except OSError as error:
+        LOG.debug(error)
+    try:
+        fcntl.fcntl(fd, _F_SETPIPE_SZ, nbytes)
+    except OSError as error:
+        LOG.debug(error)
+    return get_pipe_size(fd)
+
+
+class Pipes:
+    """The os pipes to and from a subprocess and their capacities."""
+
+    def __init__(self):
+        """Start with the pipes the subprocess module makes."""
+        self.requested = None
+        self.sizes = {}
+        self.stdin_fd = None
+        self.stdout_fd = None
+
+    def measure(self, name, fd):
+        """Apply the requested size to the pipe `fd` and record it."""
+        if self.requested and self.requested > (get_pipe_size(fd) or 0):
+            set_pipe_size(fd, self.requested)
+        self.sizes[name] = get_pipe_size(fd)
+
+    def pipe_out(self):
+        """Send stdout into a new os pipe and return its read end."""
+        read_fd, self.stdout_fd = os.pipe()
+        self.measure('stdout', self.stdout_fd)
+        return read_fd
+
+    def pipe_in(self, read_fd):
+        """Read stdin from the file descriptor `read_fd`."""
+        self.stdin_fd = read_fd
+        self.measure('stdin', read_fd)
+
+    def stdio(self, stdin, stdout):
+        """Return `stdin` and `stdout`, or the os pipes standing in."""
+        if self.stdin_fd is not None:
+            stdin = self.stdin_fd
+        if self.stdout_fd is not None:
+            stdout = self.stdout_fd
+        return stdin, stdout
+
+    def started(self, proc):
+        """Size the pipes of `proc` and close the ends it has copies of."""
+        for name in ('stdin', 'stdout'):
+            stream = getattr(proc, name)
+            if stream:
+                self.measure(name, stream.fileno())
+        for pipe_fd in (self.stdin_fd, self.stdout_fd):
+            if pipe_fd is not None:
+                os.close(pipe_fd)
+        self.stdin_fd = self.stdout_fd = None
+
+
+async def write_all(fd, data):
+    """Write all of `data` to the non-blocking file descriptor `fd`."""
+    view = memoryview(data)
+    while view:
+        try:
+            sent = os.write(fd, view)
+        except BlockingIOError:
+            await trio.hazmat.wait_writable(fd)
+        else:
+            view = view[sent:]
+
+
+class Relay:
+    """Move bytes from one pipe to another without building `bytes`.
+
+    Uses splice(2) when the platform has it, otherwise copies through
+    one preallocated buffer.
+
+    """
+
+    def __init__(self, buffsize=65536):
+        """Prepare a relay that moves up to `buffsize` bytes at a time."""
+        self._buffer = None
+        self._buffsize = buffsize
+        self._splice = hasattr(os, 'splice')
+
+    @property
+    def uses_splice(self):
+        """Return whether data moves through the kernel with splice."""
+        return self._splice
+
+    async def relay(self, src_fd, dst_fd, limit=None):
+        """Move data from `src_fd` to `dst_fd` and return the byte count.
+
+        Stop at end of file or after `limit` bytes.
+
+        """
+        total = 0
+        try:
+            while limit is None or total < limit:
+                size = self._buffsize
+                if limit is not None:
+                    size = min(size, limit - total)
+                count = await self._move(src_fd, dst_fd, size)
+                if not count:
+                    break
+                total += count
+        except BrokenPipeError as error:
+            LOG.debug(error)
+        return total
+
+    async def _move(self, src_fd, dst_fd, size):
+        """Move one chunk of data."""
+        await trio.hazmat.wait_readable(src_fd)
+        if self._splice:
+            try:
+                return await self._splice_some(src_fd, dst_fd, size)
+            except OSError as error:
+                # Not a pipe on either end, use the buffer from now on.
+                if error.errno != errno.EINVAL:
+                    raise
+                self._splice = False
+        return await self._copy_some(src_fd, dst_fd, size)
+
+    @staticmethod
+    async def _splice_some(src_fd, dst_fd, size):
+        """Move a chunk inside the kernel."""
+        while True:
+            try:
+                # New in python 3.10, the caller checks for it.
+                # pylint: disable=no-member
+                return os.splice(src_fd, dst_fd, size, flags=_SPLICE_FLAGS)
+            except BlockingIOError:
+                # Either end can be the blocker, so wait for both.
+                await trio.hazmat.wait_writable(dst_fd)
+                await trio.hazmat.wait_readable(src_fd)
+
+    async def _copy_some(self, src_fd, dst_fd, size):
+        """Move a chunk through the preallocated buffer."""
+        if self._buffer is None:
+            self._buffer = memoryview(bytearray(self._buffsize))
+        while True:
+            try:
+                count = os.readv(src_fd, [self._buffer[:size]])
+            except BlockingIOError:
+                await trio.hazmat.wait_readable(src_fd)
+            else:
+                break
+        await write_all(dst_fd, self._buffer[:count])
+        return count
+
+
+class BufferPool:
+    """Preallocated buffers that relays borrow and give back.
+
+    A hop fills a borrowed buffer with ``receive_into`` and passes a
+    view of it on, and the buffer comes back once the bytes are
+    written, so no chunk allocates a new `bytes` object.
+
+    """
+
+    def __init__(self, count=4, size=65536):
+        """Allocate `count` buffers of `size` bytes."""
+        self._free = [bytearray(size) for _ in range(count)]
+        self._returned = trio.hazmat.ParkingLot()
+        self.size = size
+
+    def __len__(self):
+        """Return the number of free buffers."""
+        return len(self._free)
+
+    async def acquire(self):
+        """Return a memoryview of a free buffer, waiting for one."""
+        await trio.hazmat.checkpoint_if_cancelled()
+        while not self._free:
+            await self._returned.park()
+        return memoryview(self._free.pop())
+
+    def release(self, view):
+        """Give back the buffer under `view`, or a slice of it."""
+        self._free.append(view.obj)
+        self._returned.unpark()
+
+
+class PooledReceiveChannel(trio.abc.ReceiveChannel):
+    """Copy views of pooled buffers out of a channel as `bytes`.
+
+    Each buffer goes back to the pool as soon as it is copied, for
+    streamers that keep hold of the chunks they are sent.
+
+    """
+
+    def __init__(self, channel, pool):
+        """Receive from `channel` and give the buffers back to `pool`."""
+        self._channel = channel
+        self._pool = pool
+
+    def _copy(self, view):
+        """Return the bytes in `view` and give its buffer back."""
+        try:
+            return bytes(view)
+        finally:
+            self._pool.release(view)
+
+    def clone(self):
+        """Return another handle on the same channel."""
+        return PooledReceiveChannel(self._channel.clone(), self._pool)
+
+    def receive_nowait(self):
+        """Return a copy of the next chunk or raise `trio.WouldBlock`."""
+        return self._copy(self._channel.receive_nowait())
+
+    async def receive(self):
+        """Return a copy of the next chunk."""
+        return self._copy(await self._channel.receive())
+
+    async def aclose(self):
+        """Close the channel."""
+        await self._channel.aclose()
+
+
+class PipeStreamer(metaclass=abc.ABCMeta):
+    """Stream through the pipes of a subprocess by file descriptor.
+
+    Subclasses set ``self._chunk_size``.
+
+    """
+
+    _limit = None
+
+    @property
+    @abc.abstractmethod
+    def proc(self):
+        """Return the :class:`trio.Process` to stream through."""
+
+    @property
+    def chunk_size(self):
+        """Return the :class:`~reel.ChunkSize` used to read stdout."""
+        return self._chunk_size
+
+    @chunk_size.setter
+    def chunk_size(self, value):
+        """Set the read size policy, or a fixed size in bytes."""
+        if isinstance(value, int):
+            value = ChunkSize(value)
+        self._chunk_size = value
+
+    @property
+    def can_pipe(self):
+        """Return whether stdout can be handed straight to another process."""
+        return self._limit is None
+
+    def limit(self, byte_limit=65536):
+        """Configure this `spool` to limit output to `byte_limit` bytes."""
+        self._limit = byte_limit
+        return self
+
+    def stdin_fileno(self):
+        """Return the file descriptor of the pipe to stdin."""
+        if self.proc and self.proc.stdin:
+            return self.proc.stdin.fileno()
+        return None
+
+    def stdout_fileno(self):
+        """Return the file descriptor of the pipe from stdout."""
+        if self.proc and self.proc.stdout:
+            return self.proc.stdout.fileno()
+        return None
+
+    async def receive_from_channel(self, channel):
+        """Send output of channel to stdin."""
+        try:
+            async with self.proc.stdin:
+                async for chunk in channel:
+                    await self.proc.stdin.send_all(chunk)
+        except trio.ClosedResourceError as error:
+            LOG.debug(error)
+        except AttributeError:
+            LOG.debug('<><><><><><><><><><><: %s %s', self, self.proc)
+
+    async def receive_from_streamer(self, streamer):
+        """Relay the output of `streamer` straight to stdin."""
+        try:
+            async with self.proc.stdin:
+                await streamer.send_to_fd(self.stdin_fileno())
+        except trio.ClosedResourceError as error:
+            LOG.debug(error)
+
+    async def send_to_fd(self, fd):
+        """Relay stdout to the file descriptor `fd`."""
+        async with self.proc:
+            await Relay(self._chunk_size.size).relay(
+                self.stdout_fileno(), fd, limit=self._limit
+            )
+
+    async def send_to_channel(self, channel):
+        """Stream stdout to `channel` and close both sides."""
+        async with channel:
+            async with self.proc:
+                await self.send_no_close(channel)
+
+    async def send_all(self, chunk):
+        """Send a chunk of data to stdin."""
+        await self.proc.stdin.send_all(chunk)
+
+    async def send_from(self, view):
+        """Write the bytes in `view` to stdin."""
+        await self.proc.stdin.send_all(view)
+
+    async def receive_from_buffers(self, channel, pool):
+        """Write views of buffers from `pool` to stdin and give them back."""
+        try:
+            async with self.proc.stdin, channel:
+                async for view in channel:
+                    try:
+                        await self.send_from(view)
+                    finally:
+                        pool.release(view)
+        except trio.ClosedResourceError as error:
+            LOG.debug(error)
+
+    async def receive_into(self, buffer):
+        """Read stdout straight into `buffer` and return the byte count."""
+        fd = self.stdout_fileno()
+        if fd is None or fd < 0:
+            return 0
+        await trio.hazmat.wait_readable(fd)
+        while True:
+            try:
+                return os.readv(fd, [buffer])
+            except BlockingIOError:
+                await trio.hazmat.wait_readable(fd)
+
+    async def send_to_buffers(self, channel, pool):
+        """Read stdout into buffers from `pool` and send views to `channel`."""
+        bytes_received = 0
+        async with channel:
+            async with self.proc:
+                while not self._limit or bytes_received <= self._limit:
+                    size = self._chunk_size.size
+                    if self._limit and self._limit < size:
+                        size = self._limit
+                    buffer = await pool.acquire()
+                    count = await self.receive_into(buffer[:size])
+                    if not count:
+                        pool.release(buffer)
+                        break
+                    self._chunk_size.update(count)
+                    await channel.send(buffer[:count])
+                    bytes_received += count
+
+    async def receive_some(self, max_bytes):
+        """Return a chunk of data from the output of this stream."""
+        try:
+            return await self.proc.stdout.receive_some(max_bytes)
+        except trio.ClosedResourceError as error:
+            LOG.debug(error)
+
+    async def send_no_close(self, channel):
+        """Stream stdout to `channel` without closing either side."""
+        bytes_received = 0
+
+        while True:
+
+            # Don't receive more than the bytes limit.
+            buffsize = self._chunk_size.size
+            if self._limit and self._limit < buffsize:
+                buffsize = self._limit
+
+            # <=~ Receive data.
+            chunk = await self.receive_some(buffsize)
+            if not chunk:
+                break
+            self._chunk_size.update(len(chunk))
+
+            # ~=> Send data.
+            await channel.send(chunk)
+
+            # Check for byte limit.
+            bytes_received += len(chunk)
+            if self._limit and bytes_received > self._limit:
+                break
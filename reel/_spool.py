@@ -6,12 +6,17 @@ import subprocess
 
 import trio
 
+from .config import get_xdg_cache_dir
+from ._chunk import ChunkSize
+from ._launch import Launch
+from ._output import Output
+from ._relay import PipeStreamer
 from ._transport import Transport
 
 LOG = logging.getLogger(__name__)
 
 
-class Spool(trio.abc.AsyncResource):
+class Spool(PipeStreamer, trio.abc.AsyncResource):
     """A shell command."""
 
     def __init__(self, command, xenv=None, xflags=None):
@@ -20,19 +25,19 @@ class Spool(trio.abc.AsyncResource):
             self._command = command
         else:
             self._command = shlex.split(command)
-        self._env = os.environ.copy()
+        self._chunk_size = ChunkSize()
+        self._launch = Launch(os.environ.copy())
         self._limit = None
         self._proc = None
-        self._status = None
-        self._stderr = None
-        self._stdout = None
+        self._stderr = Output()
+        self._stdout = Output()
         if xflags:
             for flag in xflags:
                 # Accept objects like Path that look like a str
                 self._command.append(str(flag))
         if xenv:
             for key, val in xenv.items():
-                self._env[key] = val
+                self._launch.env[key] = val
         # super().__init__()
         LOG.debug(self.__repr__())
 
@@ -68,6 +73,11 @@ class Spool(trio.abc.AsyncResource):
             return self._proc.pid
         return None
 
+    @property
+    def output(self):
+        """Return the collected stdout."""
+        return self._stdout
+
     @property
     def proc(self):
         """Return the process."""
@@ -88,33 +98,71 @@ class Spool(trio.abc.AsyncResource):
     @property
     def stdout(self):
         """Return whatever the process sent to stdout."""
-        # if self._stdout:
-        #    return self._stdout.decode('utf-8')
-        # return None
-        return self._stdout
+        if self._stdout:
+            return self._stdout.getvalue()
+        return None
+
+    @property
+    def pipe_sizes(self):
+        """Return the capacity in bytes of each pipe to the process."""
+        return dict(self._launch.pipes.sizes)
+
+    def pipe_size(self, nbytes=1024**2):
+        """Ask for pipes that hold `nbytes`, up to the system maximum."""
+        self._launch.pipes.requested = nbytes
+        return self
+
+    def pipe_to(self, next_one):
+        """Connect stdout to the stdin of `next_one` with an os pipe."""
+        next_one.pipe_from(self._launch.pipes.pipe_out())
+
+    def pipe_from(self, read_fd):
+        """Read stdin from the file descriptor `read_fd`."""
+        self._launch.pipes.pipe_in(read_fd)
+
+    def launcher(self, name='spawn'):
+        """Launch the subprocess with ``'fork'`` or ``'spawn'``.
+
+        ``'spawn'`` uses posix_spawn(3) where the platform has it, so a
+        launch takes the same time however big this process grows.
+
+        """
+        self._launch.use(name)
+        return self
+
+    def spill(self, threshold=64 * 1024**2):
+        """Keep stdout in a cache file once it grows past `threshold`.
 
-    def limit(self, byte_limit=65536):
-        """Configure this `spool` to limit output to `byte_limit` bytes."""
-        self._limit = byte_limit
+        With spill on, ``run(text=False)`` returns the
+        :class:`~reel._output.Output` itself, which can be opened as a
+        file or mapped with ``getbuffer()``.
+
+        """
+        self._stdout = Output(threshold)
         return self
 
-    async def run(self, message=b''):
+    def _open_process(self, stdin, stdout):
+        """Launch the command with the configured launcher and pipes."""
+        return self._launch.open(self._command, stdin, stdout)
+
+    async def run(self, message=b'', text=True):
         """Send stdin to process and return stdout."""
+        spill_at = self._stdout.spill_at
+        if spill_at is not None:
+            self._stdout = Output(spill_at, await get_xdg_cache_dir())
         async with trio.open_nursery() as nursery:
-            self._proc = trio.Process(
-                self._command,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                env=self._env
-            )
+            self._proc = self._open_process(subprocess.PIPE, subprocess.PIPE)
             nursery.start_soon(self._handle_stdin, message)
             nursery.start_soon(self._handle_stdout, self._limit)
             nursery.start_soon(self._handle_stderr)
         await self._proc.wait()
-        if self._stdout:
-            return self._stdout.decode('utf-8', errors='ignore').strip()
-        return None
+        if not self._stdout:
+            return None
+        if not text:
+            if spill_at is not None:
+                return self._stdout
+            return self._stdout.getvalue()
+        return self._stdout.decode('utf-8', errors='ignore').strip()
 
     async def _handle_stderr(self):
         """Read stderr."""
@@ -127,17 +175,18 @@ class Spool(trio.abc.AsyncResource):
             else:
                 if not chunk:
                     break
-                if not self._stderr:
-                    self._stderr = b''
-                self._stderr += chunk
+                self._stderr.write(chunk)
 
     async def _handle_stdout(self, limit=None):
         """Read stdout."""
-        max_rcv = limit or 16834
+        remaining = limit
 
         while True:
+            buffsize = self._chunk_size.size
+            if remaining is not None:
+                buffsize = min(buffsize, remaining)
             try:
-                chunk = await self._proc.stdout.receive_some(max_rcv)
+                chunk = await self._proc.stdout.receive_some(buffsize)
                 LOG.debug(chunk)
             except trio.ClosedResourceError:
                 LOG.debug('Stdout closed', exc_info=True)
@@ -145,11 +194,12 @@ class Spool(trio.abc.AsyncResource):
             else:
                 if not chunk:
                     break
-                if not self._stdout:
-                    self._stdout = b''
-                self._stdout += chunk
-                max_rcv -= len(chunk)
-                if max_rcv == 0:
+                self._stdout.write(chunk)
+                self._chunk_size.update(len(chunk))
+                if remaining is None:
+                    continue
+                remaining -= len(chunk)
+                if remaining == 0:
                     await self._proc.stderr.aclose()
                     await self._proc.stdout.aclose()
                     break
@@ -165,90 +215,15 @@ class Spool(trio.abc.AsyncResource):
         async with self.proc.stdin as stdin:
             await stdin.send_all(_msg)
 
-    def handle_stderr(self, nursery):
-        """Read stderr, called as a task in a nursery."""
-        nursery.start_soon(self._handle_stderr)
-
-    def handle_stdout(self, nursery):
-        """Read stdout, called as a task in a nursery."""
-        nursery.start_soon(self._handle_stdout)
-
-    def handle_stdin(self, nursery, message):
-        """Feed stdin, called as a task in a nursery."""
-        nursery.start_soon(self._handle_stdin, message)
-
     def start(self, nursery, stdin=None):
         """Initialize the subprocess and run the command."""
         LOG.debug('-- << SPOOL start about to run proc %s', self)
-        self._proc = trio.Process(
-            self._command,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            env=self._env
-        )
+        self._proc = self._open_process(subprocess.PIPE, subprocess.PIPE)
         LOG.debug('-- >> SPOOL start ljjjj to run proc %s', self._proc)
         if stdin:
-            self.handle_stdin(nursery, stdin)
-        self.handle_stderr(nursery)
+            nursery.start_soon(self._handle_stdin, stdin)
+        nursery.start_soon(self._handle_stderr)
 
     async def stop(self):
         """Stop it."""
         await self.aclose()
-
-    async def receive_from_channel(self, channel):
-        """Send output of channel to stdin."""
-        try:
-            async with self._proc.stdin:
-                async for chunk in channel:
-                    await self._proc.stdin.send_all(chunk)
-        except trio.ClosedResourceError as error:
-            LOG.debug(error)
-        except AttributeError:
-            LOG.debug('<><><><><><><><><><><: %s %s', self, self._proc)
-
-    async def send_to_channel(self, channel):
-        """Stream stdout to `channel` and close both sides."""
-        async with channel:
-            async with self.proc:
-                await self.send_no_close(channel)
-
-    async def send_all(self, chunk):
-        """Send a chunk of data to stdin."""
-        await self._proc.stdin.send_all(chunk)
-
-    async def receive_some(self, max_bytes):
-        """Return a chunk of data from the output of this stream."""
-        try:
-            return await self._proc.stdout.receive_some(max_bytes)
-        except trio.ClosedResourceError as error:
-            LOG.debug(error)
-
-    async def send_no_close(self, channel):
-        """Stream stdout to `channel` without closing either side."""
-        buffsize = 16384
-        bytes_received = 0
-
-        # Don't receive more than the bytes limit.
-        if self._limit and self._limit < 16384:
-            buffsize = self._limit
-
-        # <=~ Receive data.
-        chunk = await self.receive_some(buffsize)
-        while chunk:
-
-            # ~=> Send data.
-            await channel.send(chunk)
-
-            # Check for byte limit.
-            bytes_received += len(chunk)
-            if self._limit and bytes_received > self._limit:
-                break
-
-            # Cap buffer at limit.
-            buffsize = 16384
-            if self._limit and self._limit < 16384:
-                buffsize = self._limit
-
-            # <=~ Receive data.
-            chunk = await self.receive_some(buffsize)
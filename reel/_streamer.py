@@ -2,11 +2,18 @@
 import abc
 import logging
 
+from ._chunk import ChunkSize
+from ._relay import PooledReceiveChannel, write_all
+
 LOG = logging.getLogger(__name__)
 
 
 class Streamer(metaclass=abc.ABCMeta):
-    """Something that can stream i/o in a transport."""
+    """Something that can stream i/o in a transport.
+
+    Subclasses set ``self._chunk_size`` to a :class:`~reel.ChunkSize`.
+
+    """
 
     @abc.abstractmethod
     def start(self, nursery, stdin=None):
@@ -16,6 +23,18 @@ class Streamer(metaclass=abc.ABCMeta):
 
         """
 
+    @property
+    def chunk_size(self):
+        """Return the :class:`~reel.ChunkSize` used to read output."""
+        return self._chunk_size
+
+    @chunk_size.setter
+    def chunk_size(self, value):
+        """Set the read size policy, or a fixed size in bytes."""
+        if isinstance(value, int):
+            value = ChunkSize(value)
+        self._chunk_size = value
+
     async def stop(self):
         """Stop it."""
 
@@ -24,18 +43,68 @@ class Streamer(metaclass=abc.ABCMeta):
         LOG.debug('-Streamer- send_to_channel')
         async with channel:
             while True:
-                chunk = await self.receive_some(65536)
+                chunk = await self.receive_some(self._chunk_size.size)
                 if chunk:
+                    self._chunk_size.update(len(chunk))
                     await channel.send(chunk)
                 else:
                     break
 
+    async def send_to_fd(self, fd):
+        """Send data to the file descriptor `fd` until the stream ends."""
+        while True:
+            chunk = await self.receive_some(self._chunk_size.size)
+            if chunk:
+                self._chunk_size.update(len(chunk))
+                await write_all(fd, chunk)
+            else:
+                break
+
     async def receive_from_channel(self, channel):
         """Receive data from the channel."""
         async with channel:
             async for chunk in channel:
                 await self.send_all(chunk)
 
+    async def receive_into(self, buffer):
+        """Read output into `buffer` and return the byte count, 0 at the end.
+
+        The default copies a chunk from :meth:`receive_some`.
+
+        """
+        view = memoryview(buffer)
+        chunk = await self.receive_some(len(view))
+        if not chunk:
+            return 0
+        view[:len(chunk)] = chunk
+        return len(chunk)
+
+    async def send_from(self, view):
+        """Send the bytes in `view` to input and be done with `view`.
+
+        The default sends a copy with :meth:`send_all`.
+
+        """
+        await self.send_all(bytes(view))
+
+    async def send_to_buffers(self, channel, pool):
+        """Send output in buffers from `pool` to `channel` and close it."""
+        async with channel:
+            while True:
+                buffer = await pool.acquire()
+                count = await self.receive_into(
+                    buffer[:self._chunk_size.size]
+                )
+                if not count:
+                    pool.release(buffer)
+                    break
+                self._chunk_size.update(count)
+                await channel.send(buffer[:count])
+
+    async def receive_from_buffers(self, channel, pool):
+        """Receive views of buffers from `pool` and give them back."""
+        await self.receive_from_channel(PooledReceiveChannel(channel, pool))
+
     @abc.abstractmethod
     async def receive_some(self, max_bytes):
         """Return a chunk of data from this stream's output."""
@@ -0,0 +1,185 @@
+"""Tee class."""
+import logging
+
+import trio
+
+from ._channel import POLICIES, open_channel
+from ._chunk import ChunkSize
+from ._streamer import Streamer
+
+LOG = logging.getLogger(__name__)
+
+
+class _Branch:
+    """One sink of a tee with its own buffer."""
+
+    def __init__(self, sink, max_chunks, max_bytes, policy):
+        """Remember how to feed `sink`."""
+        self.cancel_scope = trio.CancelScope()
+        self.disconnected = False
+        self.max_bytes = max_bytes
+        self.max_chunks = max_chunks
+        self.policy = policy
+        self.send_ch = None
+        self.sink = sink
+
+    def open(self):
+        """Open the buffer to the sink and return its receiving end."""
+        policy = 'block' if self.policy == 'disconnect' else self.policy
+        self.send_ch, receive_ch = open_channel(
+            self.max_chunks, self.max_bytes, policy
+        )
+        return receive_ch
+
+    async def disconnect(self):
+        """Stop feeding the sink."""
+        LOG.debug('tee disconnects %s', self.sink)
+        self.disconnected = True
+        self.cancel_scope.cancel()
+        await self.send_ch.aclose()
+
+    async def feed(self, receive_ch, on_done):
+        """Stream the buffer into the sink until it ends or disconnects."""
+        with self.cancel_scope:
+            async with receive_ch:
+                try:
+                    await self.sink.receive_from_channel(receive_ch)
+                except trio.BrokenResourceError as error:
+                    LOG.debug('tee sink %s broke: %s', self.sink, error)
+        on_done()
+
+
+class Tee(trio.abc.AsyncResource, Streamer):
+    """Copy one stream to many sinks, reading the source only once.
+
+    Each sink gets its own buffer and a policy for when it falls
+    behind: ``'block'`` holds up every sink, ``'drop_oldest'`` and
+    ``'drop_newest'`` lose chunks for that sink only, and
+    ``'disconnect'`` closes that sink's input.  A tee has no output of
+    its own, it ends when all of its sinks are done, and whatever the
+    sinks write to their own output is thrown away.
+
+    """
+
+    def __init__(self, sinks=(), max_chunks=16, max_bytes=None,
+                 policy='block'):
+        """Feed each of `sinks` with the same buffer settings."""
+        self._branches = []
+        self._chunk_size = ChunkSize()
+        self._done = trio.Event()
+        self._remaining = 0
+        for sink in sinks:
+            self.add(sink, max_chunks, max_bytes, policy)
+
+    def __str__(self):
+        """Print the sinks."""
+        return self.__repr__()
+
+    def __repr__(self):
+        """Represent prettily."""
+        result = 'Tee([ '
+        for branch in self._branches:
+            result += branch.sink.__repr__()
+            result += ','
+        result += ' ])'
+        return result
+
+    @property
+    def sinks(self):
+        """Return the list of sinks."""
+        return [branch.sink for branch in self._branches]
+
+    @property
+    def disconnected(self):
+        """Return the sinks that were cut off for falling behind."""
+        return [branch.sink for branch in self._branches
+                if branch.disconnected]
+
+    def add(self, sink, max_chunks=16, max_bytes=None, policy='block'):
+        """Feed another `sink` with its own buffer settings."""
+        if policy not in POLICIES + ('disconnect',):
+            raise ValueError(f'unknown tee policy {policy!r}')
+        self._branches.append(_Branch(sink, max_chunks, max_bytes, policy))
+        return self
+
+    async def aclose(self):
+        """Close the sinks."""
+        for branch in self._branches:
+            await branch.sink.aclose()
+
+    def start(self, nursery, stdin=None):
+        """Start each sink with a buffer of its own."""
+        self._remaining = len(self._branches)
+        if not self._remaining:
+            self._done.set()
+        for branch in self._branches:
+            branch.sink.start(nursery)
+            nursery.start_soon(branch.feed, branch.open(), self._branch_done)
+            nursery.start_soon(self._discard_output, branch.sink)
+        if stdin:
+            nursery.start_soon(self._send_and_close, stdin)
+
+    @staticmethod
+    async def _discard_output(sink):
+        """Read and drop the output of a sink so it never fills a pipe."""
+        while True:
+            try:
+                chunk = await sink.receive_some(sink.chunk_size.size)
+            except (trio.BrokenResourceError, trio.ClosedResourceError):
+                break
+            if not chunk:
+                break
+
+    def _branch_done(self):
+        """Count down the sinks still running."""
+        self._remaining -= 1
+        if not self._remaining:
+            self._done.set()
+
+    async def send_all(self, chunk):
+        """Send a chunk of data to every connected sink."""
+        waited = False
+        for branch in self._branches:
+            if branch.cancel_scope.cancel_called:
+                continue
+            try:
+                if branch.policy == 'disconnect':
+                    try:
+                        branch.send_ch.send_nowait(chunk)
+                    except trio.WouldBlock:
+                        await branch.disconnect()
+                        waited = True
+                else:
+                    await branch.send_ch.send(chunk)
+                    waited = True
+            except (trio.BrokenResourceError, trio.ClosedResourceError):
+                branch.cancel_scope.cancel()
+        if not waited:
+            await trio.hazmat.checkpoint()
+
+    async def _close_branches(self):
+        """Signal the end of the stream to every sink."""
+        for branch in self._branches:
+            await branch.send_ch.aclose()
+
+    async def _send_and_close(self, chunk):
+        """Send one chunk and end the stream."""
+        await self.send_all(chunk)
+        await self._close_branches()
+
+    async def receive_from_channel(self, channel):
+        """Copy each chunk from `channel` to the sinks."""
+        async with channel:
+            async for chunk in channel:
+                await self.send_all(chunk)
+        await self._close_branches()
+
+    async def receive_some(self, max_bytes):
+        """Return EOF once the sinks are done, a tee has no output."""
+        await self._done.wait()
+        return b''
+
+    async def send_to_channel(self, channel):
+        """Close `channel` once all of the sinks are done."""
+        async with channel:
+            await self._done.wait()
@@ -1,23 +1,178 @@
 """Track class."""
+from concurrent.futures import Executor, ProcessPoolExecutor
+import inspect
 import logging
 
 import trio
 
+from ._chunk import ChunkSize
 from ._streamer import Streamer
 from ._transport import Transport
 
 LOG = logging.getLogger(__name__)
 
+EXECUTORS = ('inline', 'thread', 'process')
+
+# Renamed to trio.to_thread.run_sync in trio 0.12.
+if hasattr(trio, 'to_thread'):
+    run_sync_in_thread = trio.to_thread.run_sync  # pylint: disable=no-member
+else:
+    run_sync_in_thread = trio.run_sync_in_worker_thread
+
+
+async def wait_for_future(future):
+    """Return the result of a concurrent `future` without a waiting thread.
+
+    The future's callback wakes this task, and cancelling the task
+    cancels the future if it has not started yet.
+
+    """
+    token = trio.hazmat.current_trio_token()
+    done = trio.Event()
+
+    def wake(_):
+        """Wake the waiting task from whichever thread finished."""
+        try:
+            token.run_sync_soon(done.set)
+        except trio.RunFinishedError:
+            pass
+
+    future.add_done_callback(wake)
+    try:
+        await done.wait()
+    finally:
+        if not future.done():
+            future.cancel()
+    return future.result()
+
+
+class _Job:
+    """One call of a track's function."""
+
+    def __init__(self):
+        """Start without a result."""
+        self._done = trio.Event()
+        self._error = None
+        self._result = None
+
+    async def run(self, call, *args):
+        """Await the async function `call` with `args`."""
+        try:
+            self._result = await call(*args)
+        except Exception as error:  # pylint: disable=broad-except
+            self._error = error
+        finally:
+            self._done.set()
+
+    async def result(self):
+        """Wait for the call and return its result or raise its error."""
+        await self._done.wait()
+        if self._error:
+            raise self._error
+        return self._result
+
+
+class Workers:
+    """Where the function of a track runs, and how many calls at once.
+
+    The `executor` is ``'inline'`` for the event loop, ``'thread'`` for
+    worker threads, ``'process'`` for a process pool of our own, or any
+    :class:`concurrent.futures.Executor`.
+
+    """
+
+    def __init__(self, executor='inline', max_in_flight=4):
+        """Run up to `max_in_flight` calls at once with `executor`."""
+        if not isinstance(executor, Executor) and executor not in EXECUTORS:
+            raise ValueError(f'unknown executor {executor!r}')
+        self._pool = None
+        self.executor = executor
+        self.max_in_flight = max(max_in_flight, 1)
+
+    @property
+    def inline(self):
+        """Return whether calls run on the event loop."""
+        return self.executor == 'inline'
+
+    def open(self):
+        """Get the pool ready, if the executor needs one."""
+        if isinstance(self.executor, Executor):
+            self._pool = self.executor
+        elif self.executor == 'process':
+            self._pool = ProcessPoolExecutor(self.max_in_flight)
+
+    async def aclose(self):
+        """Let go of the pool, and wait for the workers of our own."""
+        pool, self._pool = self._pool, None
+        if pool is not None and pool is not self.executor:
+            await run_sync_in_thread(pool.shutdown)
+
+    async def call(self, func, chunk):
+        """Return `func` of `chunk`, run by the executor."""
+        if self._pool is not None:
+            return await wait_for_future(self._pool.submit(func, chunk))
+        if self.executor == 'thread':
+            return await run_sync_in_thread(func, chunk)
+        return func(chunk)
+
+    @staticmethod
+    async def _emit_in_order(jobs, emit):
+        """Send on the output of each job in the order they started."""
+        async with jobs:
+            async for job in jobs:
+                await emit(await job.result())
+
+    async def map(self, func, chunks, emit):
+        """Work on several `chunks` at once and `emit` output in order."""
+        async with trio.open_nursery() as nursery:
+            send_ch, receive_ch = trio.open_memory_channel(
+                self.max_in_flight - 1
+            )
+            nursery.start_soon(self._emit_in_order, receive_ch, emit)
+            async with send_ch:
+                async for chunk in chunks:
+                    job = _Job()
+                    await send_ch.send(job)
+                    nursery.start_soon(job.run, self.call, func, chunk)
+
 
 class Track(trio.abc.AsyncResource, Streamer):
-    """Something that can produce a stream."""
+    """Something that can produce a stream.
+
+    By default `func` transforms one input blob, and the track ends.
+    With `stream` on, the track keeps running over a stream of chunks,
+    and `func` is one of:
+
+    * a callable, called with each chunk;
+    * a generator function, called with no arguments, that is sent each
+      chunk and yields the output for it, then is sent ``b''`` at the
+      end of the stream and yields whatever it still holds;
+    * an async generator function, called with an async iterator of the
+      chunks, that yields output as it likes.
+
+    Output that is empty or None is skipped.
 
-    def __init__(self, func):
+    The `executor` decides where a callable runs: ``'inline'`` on the
+    event loop, ``'thread'`` in worker threads, ``'process'`` in a
+    process pool, which needs a function that can be pickled, or any
+    :class:`concurrent.futures.Executor`.  Up to `max_in_flight` chunks
+    are worked on at once, and their output keeps the input order.
+
+    """
+
+    # Two channel pairs, for the output and the input of a stream.
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, func, stream=False, executor='inline',
+                 max_in_flight=4):
         """Store a function for later use."""
+        self._chunk_size = ChunkSize(65536)
         self._func = func
-        self._nursery = None
-        self._stdout = None
+        self._pending = b''
+        self._stream = stream
+        self._workers = Workers(executor, max_in_flight)
         self._snd_ch, self._rcv_ch = trio.open_memory_channel(0)
+        self._in_snd_ch, self._in_rcv_ch = trio.open_memory_channel(0)
 
     def __or__(self, the_other_one):
         """Create a `Transport` out of the first two spools in the chain."""
@@ -29,21 +184,92 @@ class Track(trio.abc.AsyncResource, Streamer):
 
     async def aclose(self):
         """Close down the Track."""
+        await self._workers.aclose()
+        if self._stream:
+            await self._in_snd_ch.aclose()
+            await self._rcv_ch.aclose()
 
     def start(self, nursery, stdin=None):
         """Begin the process of creating a data stream."""
-        self._nursery = nursery
-        if stdin:
+        self._workers.open()
+        if self._stream:
+            nursery.start_soon(self._transform)
+            if stdin:
+                nursery.start_soon(self._send_and_close, stdin)
+        elif stdin:
             nursery.start_soon(self.send_all, stdin)
 
+    async def _send_and_close(self, chunk):
+        """Send one chunk and end the input stream."""
+        async with self._in_snd_ch:
+            await self._in_snd_ch.send(chunk)
+
+    async def _emit(self, output):
+        """Send output on unless it is empty."""
+        if output:
+            await self._snd_ch.send(output)
+
+    async def _transform(self):
+        """Run the input stream through `func` to the output."""
+        async with self._snd_ch, self._in_rcv_ch:
+            if inspect.isasyncgenfunction(self._func):
+                async for output in self._func(self._in_rcv_ch):
+                    await self._emit(output)
+            elif inspect.isgeneratorfunction(self._func):
+                generator = self._func()
+                try:
+                    await self._emit(generator.send(None))
+                    async for chunk in self._in_rcv_ch:
+                        await self._emit(generator.send(chunk))
+                    await self._emit(generator.send(b''))
+                except StopIteration:
+                    pass
+                finally:
+                    generator.close()
+            elif self._workers.inline:
+                async for chunk in self._in_rcv_ch:
+                    await self._emit(self._func(chunk))
+            else:
+                await self._workers.map(
+                    self._func, self._in_rcv_ch, self._emit
+                )
+        await self._workers.aclose()
+
     async def send_all(self, chunk):
         """Send a chunk of data to the input of this stream."""
+        if self._stream:
+            await self._in_snd_ch.send(chunk)
+            return
         async with self._snd_ch:
-            await self._snd_ch.send(self._func(chunk))
+            try:
+                await self._snd_ch.send(
+                    await self._workers.call(self._func, chunk)
+                )
+            finally:
+                await self._workers.aclose()
             await self._snd_ch.send(None)
 
+    async def receive_from_channel(self, channel):
+        """Receive data from the channel and end the input with it."""
+        if not self._stream:
+            await super().receive_from_channel(channel)
+            return
+        async with channel, self._in_snd_ch:
+            async for chunk in channel:
+                await self._in_snd_ch.send(chunk)
+
     async def receive_some(self, max_bytes=65536):
         """Return a chunk of data from the output of this stream."""
+        if self._stream:
+            if not self._pending:
+                try:
+                    self._pending = await self._rcv_ch.receive()
+                except (trio.EndOfChannel, trio.ClosedResourceError):
+                    return b''
+            chunk = self._pending[:max_bytes]
+            self._pending = self._pending[max_bytes:]
+            return chunk
+
         # async with self._rcv_ch:
         result = await self._rcv_ch.receive()
         if not result:
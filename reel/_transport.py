@@ -1,8 +1,17 @@
 """Transport class."""
+import codecs
+from contextlib import asynccontextmanager
 import logging
 
 import trio
 
+from .config import get_xdg_cache_dir
+from ._channel import POLICIES, Hops
+from ._chunk import ChunkSize
+from ._output import Output
+from ._pcm import FRAME_SIZE
+from ._relay import BufferPool
+
 LOG = logging.getLogger(__name__)
 
 
@@ -12,9 +21,11 @@ class Transport(trio.abc.AsyncResource):
     def __init__(self, *args):
         """Create a transport chain from a list of spools."""
         self._cancel_scope = None
+        self._chunk_size = None
+        self._hops = Hops()
         self._is_done = trio.Event()
         self._nursery = None
-        self._output = None
+        self._output = Output()
         if len(args) == 1 and isinstance(args[0], list):
             self._chain = []
             for spool in args[0]:
@@ -38,6 +49,88 @@ class Transport(trio.abc.AsyncResource):
         self._chain.append(next_one)
         return self
 
+    def buffer(self, chunks=0, max_bytes=None, policy='block', hop=None):
+        """Size the channel buffer between streamers.
+
+        Hop ``n`` feeds ``chain[n]`` from ``chain[n - 1]`` and hop
+        ``len(chain)`` carries the output of the last streamer.  Without
+        a `hop` this sets the default for every hop.  See
+        :func:`~reel._channel.open_channel` for the policies.
+
+        """
+        if policy not in POLICIES:
+            raise ValueError(f'unknown buffer policy {policy!r}')
+        self._hops.buffers[hop] = (chunks, max_bytes, policy)
+        return self
+
+    def framing(self, frame_size=FRAME_SIZE, hop=None):
+        """Pass only whole frames of `frame_size` bytes over a hop.
+
+        Chunks are cut at a frame boundary and the partial frame is
+        carried over to the next chunk, so a streamer in python never
+        sees half a sample.  Hops are numbered as in :meth:`buffer` and
+        without a `hop` every hop is framed.  Hops between file
+        descriptors are left alone.
+
+        """
+        self._hops.framing[hop] = frame_size
+        return self
+
+    def chunking(self, policy):
+        """Read with a copy of the :class:`~reel.ChunkSize` `policy`.
+
+        Every streamer in the chain gets its own copy so adaptive sizes
+        follow each stream separately.  An `int` means a fixed size.
+
+        """
+        if isinstance(policy, int):
+            policy = ChunkSize(policy)
+        self._chunk_size = policy
+        return self
+
+    def kernel_pipes(self, enabled=True):
+        """Connect adjacent spools with os pipes instead of python.
+
+        Each pair of neighboring subprocesses shares one pipe, like a
+        shell pipeline, so their bytes never pass through this process.
+
+        """
+        self._hops.kernel_pipes = enabled
+        return self
+
+    def zero_copy(self, enabled=True):
+        """Relay hops into a spool between file descriptors.
+
+        Hops that stay in python, like a reel switching tracks, move
+        their bytes with splice instead of a memory channel.
+
+        """
+        self._hops.zero_copy = enabled
+        return self
+
+    def buffer_pool(self, buffers=4):
+        """Relay hops in python through `buffers` preallocated buffers.
+
+        Each source reads into a borrowed buffer with ``receive_into``
+        and the next streamer writes it out with ``send_from`` before
+        giving it back, so a hop between spools allocates nothing per
+        chunk.  Hops that drop chunks or cut frames are left alone.
+
+        """
+        self._hops.pool_buffers = buffers
+        return self
+
+    def spill(self, threshold=64 * 1024**2):
+        """Keep stdout in a cache file once it grows past `threshold`.
+
+        With spill on, ``read(text=False)`` returns the
+        :class:`~reel._output.Output` itself, which can be opened as a
+        file or mapped with ``getbuffer()``.
+
+        """
+        self._output = Output(threshold)
+        return self
+
     async def aclose(self):
         """Clean up resources."""
         for streamer in self._chain:
@@ -56,6 +149,11 @@ class Transport(trio.abc.AsyncResource):
         result += ' ])'
         return result
 
+    @property
+    def output(self):
+        """Return the collected stdout of the chain."""
+        return self._output
+
     @property
     def is_done(self):
         """Has this thing finished playing."""
@@ -65,18 +163,60 @@ class Transport(trio.abc.AsyncResource):
         """Wait until this is done."""
         await self._is_done.wait()
 
-    async def _run(self, nursery, message=None):
-        """Connect the spools with pipes and let the bytes flow."""
+    def _connect_kernel_pipes(self):
+        """Share an os pipe between neighboring spools where possible."""
+        piped = set()
+        if self._hops.kernel_pipes:
+            for idx in range(1, len(self._chain)):
+                _src = self._chain[idx - 1]
+                _dst = self._chain[idx]
+                if (getattr(_src, 'can_pipe', False) and
+                        hasattr(_dst, 'pipe_from')):
+                    _src.pipe_to(_dst)
+                    piped.add(idx)
+        return piped
+
+    async def _connect(self, nursery, message=None):
+        """Connect the spools with pipes and return the output channel."""
+        if self._chunk_size:
+            for streamer in self._chain:
+                streamer.chunk_size = self._chunk_size.copy()
+        piped = self._connect_kernel_pipes()
         for idx, spool in enumerate(self._chain):
             if idx == 0:  # Gets stdin
                 spool.start(nursery, message)
             else:
                 spool.start(nursery)
-
-                # Create a pipe
                 _src = self._chain[idx - 1]
                 _dst = spool
-                send_ch, receive_ch = trio.open_memory_channel(0)
+
+                # Reap the upstream process, the kernel moves the bytes
+                if idx in piped:
+                    nursery.start_soon(_src.proc.wait)
+                    continue
+
+                # Relay between file descriptors
+                if (self._hops.zero_copy and hasattr(_src, 'send_to_fd') and
+                        hasattr(_dst, 'receive_from_streamer')):
+                    nursery.start_soon(_dst.receive_from_streamer, _src)
+                    continue
+
+                # Relay through a pool of buffers
+                if (self._hops.can_pool(idx) and
+                        hasattr(_src, 'send_to_buffers') and
+                        hasattr(_dst, 'receive_from_buffers')):
+                    pool = BufferPool(
+                        self._hops.pool_buffers, _src.chunk_size.maximum
+                    )
+                    send_ch, receive_ch = self._hops.open(idx)
+                    nursery.start_soon(_src.send_to_buffers, send_ch, pool)
+                    nursery.start_soon(
+                        _dst.receive_from_buffers, receive_ch, pool
+                    )
+                    continue
+
+                # Create a pipe
+                send_ch, receive_ch = self._hops.open(idx)
                 async with send_ch, receive_ch:
                     nursery.start_soon(
                         _src.send_to_channel, send_ch.clone()
@@ -87,17 +227,26 @@ class Transport(trio.abc.AsyncResource):
 
         # Read stdout from the last spool in the list
         LOG.debug('about to read stdout of chain')
-        ch_send, ch_receive = trio.open_memory_channel(0)
+        ch_send, ch_receive = self._hops.open(len(self._chain))
         nursery.start_soon(self._chain[-1].send_to_channel, ch_send)
-        async for chunk in ch_receive:
-            if not self._output:
-                self._output = b''
-            self._output += chunk
+        return ch_receive
 
+    def _finish(self):
+        """Mark this transport as done."""
         self._is_done.set()
         if self._cancel_scope:
             self._cancel_scope.cancel()
 
+    async def _run(self, nursery, message=None):
+        """Connect the spools with pipes and let the bytes flow."""
+        spill_at = self._output.spill_at
+        if spill_at is not None:
+            self._output = Output(spill_at, await get_xdg_cache_dir())
+        async with await self._connect(nursery, message) as ch_receive:
+            async for chunk in ch_receive:
+                self._output.write(chunk)
+        self._finish()
+
     def spawn_in(self, nursery):
         """Start this transport and return a cancel_scope."""
         nursery.start_soon(self._run, nursery)
@@ -127,22 +276,75 @@ class Transport(trio.abc.AsyncResource):
         async with trio.open_nursery() as nursery:
             await self._run(nursery, message=message)
 
-        if text and self._output:
+        if not self._output:
+            return None
+        if text:
             decoded = self._output.decode('utf-8')
 
             # Remove trailing \n
             if decoded[-1:] == '\n':
                 decoded = decoded[:-1]
             return decoded
-        return self._output
+        if self._output.spill_at is not None:
+            return self._output
+        return self._output.getvalue()
+
+    @asynccontextmanager
+    async def stream(self, message=None):
+        """Run this transport and yield a channel of stdout chunks.
+
+        Use it as ``async with transport.stream() as chunks:``.  Leaving
+        the block before the end of the output cancels the transport.
+
+        """
+        if isinstance(message, str):
+            message = message.encode('utf-8')
+        try:
+            async with trio.open_nursery() as nursery:
+                async with await self._connect(nursery, message) as chunks:
+                    yield chunks
+                    try:
+                        chunks.receive_nowait()
+                    except trio.EndOfChannel:
+                        pass
+                    except trio.WouldBlock:
+                        nursery.cancel_scope.cancel()
+                    else:
+                        nursery.cancel_scope.cancel()
+        finally:
+            self._finish()
+
+    @asynccontextmanager
+    async def lines(self, message=None, encoding='utf-8'):
+        """Run this transport and yield an iterator of stdout lines.
+
+        Use it as ``async with transport.lines() as lines:``.
+
+        """
+        async with self.stream(message) as chunks:
+            yield _split_lines(chunks, encoding)
 
     async def readlines(self):
         """Run this transport and return stdout as a `list`."""
         async with trio.open_nursery() as nursery:
             await self._run(nursery)
-        if self._output:
-            result = self._output
-        else:
-            result = b''
-        output = result.decode('utf-8')
-        return output.split('\n')[:-1]
+        return self._output.decode('utf-8').split('\n')[:-1]
+
+
+async def _split_lines(chunks, encoding):
+    """Yield the lines of text in a channel of byte `chunks`."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = []
+    async for chunk in chunks:
+        *complete, rest = decoder.decode(chunk).split('\n')
+        if complete:
+            complete[0] = ''.join(pending) + complete[0]
+            pending.clear()
+            for line in complete:
+                yield line
+        if rest:
+            pending.append(rest)
+    pending.append(decoder.decode(b'', final=True))
+    partial = ''.join(pending)
+    if partial:
+        yield partial
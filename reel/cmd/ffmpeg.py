@@ -2,8 +2,14 @@
 from .._spool import Spool
 
 
-def read(uri):
-    """Prepare a command to read an audio file and stream to stdout."""
+def read(uri, cache=None, filters=None):
+    """Prepare a command to read an audio file and stream to stdout.
+
+    With a :class:`~reel.PCMCache`, the decoded audio is saved the first
+    time and played from the cache after that.  `filters` is an ffmpeg
+    audio filter graph to run on the way, like ``'volume=-3dB'``.
+
+    """
     cmd = 'ffmpeg'
     flags = [
         '-ac', '2',  # 2-channel stereo
@@ -13,14 +19,23 @@ def read(uri):
         '-acodec', 'pcm_s16le',  # wav format
         '-',  # stream to stdout
     ]
-    return Spool(cmd, xflags=flags)
+    if filters:
+        flags[4:4] = ['-af', filters]  # audio filters
+    spool = Spool(cmd, xflags=flags)
+    if cache is not None:
+        return cache.wrap(spool, cache.key(cmd, *flags))
+    return spool
+
 
+def to_icecast(host, port, mount, password, realtime=True):
+    """Stream audio to an icecast server.
 
-def to_icecast(host, port, mount, password):
-    """Stream audio to an icecast server."""
+    Without `realtime`, ffmpeg encodes as fast as it gets input, for
+    use behind a :class:`~reel.Pacer`.
+
+    """
     cmd = 'ffmpeg'
     flags = [
-        '-re',
         '-ac', '2',
         '-ar', '44.1k',
         '-f', 's16le',
@@ -32,14 +47,20 @@ def to_icecast(host, port, mount, password):
         '-f', 'ogg',
         f'icecast://source:{password}@{host}:{port}/{mount}'
     ]
+    if realtime:
+        flags.insert(0, '-re')
     return Spool(cmd, xflags=flags)
 
 
-def to_udp(host, port):
-    """Stream audio over udp."""
+def to_udp(host, port, realtime=True):
+    """Stream audio over udp.
+
+    Without `realtime`, ffmpeg encodes as fast as it gets input, for
+    use behind a :class:`~reel.Pacer`.
+
+    """
     cmd = 'ffmpeg'
     flags = [
-        '-re',  # realtime flow control
         '-ac', '2',  # 2-channel stereo
         '-ar', '44.1k',  # sample rate
         '-f', 's16le',  # 16 bit littl-endian
@@ -50,6 +71,8 @@ def to_udp(host, port):
         '-f', 'mp3',  # mp3 format
         f'udp://{host}:{port}',  # receiver address
     ]
+    if realtime:
+        flags.insert(0, '-re')  # realtime flow control
     return Spool(cmd, xflags=flags)
 
 
@@ -21,8 +21,13 @@ class Icecast(Daemon):
         self._command.extend(['-c', str(config)])
 
     @classmethod
-    def client(cls, mount):
-        """Return a process that streams to the icecast server."""
+    def client(cls, mount, realtime=True):
+        """Return a process that streams to the icecast server.
+
+        Without `realtime`, ffmpeg encodes as fast as it gets input, for
+        use behind a :class:`~reel.Pacer`.
+
+        """
         cmd = 'ffmpeg'
         uri = 'icecast://source:{}@{}:{}/{}'.format(
             cls._config['password'],
@@ -34,7 +39,6 @@ class Icecast(Daemon):
         # -reconnect 1 -reconnect_at_eof 1 -reconnect_streamed 1 \
         # -reconnect_delay_max 2000
         flags = [
-            '-re',
             '-ac', '2',
             '-ar', '44.1k',
             '-f', 's16le',
@@ -46,4 +50,6 @@ class Icecast(Daemon):
             '-f', 'ogg',
             uri
         ]
+        if realtime:
+            flags.insert(0, '-re')
         return Spool(cmd, xflags=flags)
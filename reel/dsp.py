@@ -0,0 +1,225 @@
+"""Audio filters for raw s16le streams that run in this process.
+
+Each function returns a streaming :class:`~reel.Track` that works on
+whole chunks of frames with numpy, so it can stand in for an ffmpeg or
+sox subprocess in a transport.  Chunks may split a frame, the partial
+frame is carried over to the next chunk.  Install numpy with ``pip
+install reel[dsp]``.
+
+"""
+import logging
+
+from ._pcm import (
+    CHANNELS, CURVES, RATE, SAMPLE_WIDTH,
+    align, fade_curve, require_numpy, to_bytes, to_samples
+)
+from ._track import Track
+
+LOG = logging.getLogger(__name__)
+
+__all__ = [
+    'gain', 'fade_in', 'fade_out',
+    'to_mono', 'to_stereo', 'resample',
+    'clip', 'soft_clip', 'dc_block',
+]
+
+
+def _frames(process, channels=CHANNELS, flush=None):
+    """Return a generator function that feeds `process` whole frames.
+
+    `process` gets an int16 array of shape (frames, channels) and
+    returns samples or bytes.  `flush` returns what is left at the end.
+
+    """
+    frame_size = channels * SAMPLE_WIDTH
+
+    def transform():
+        """Carry partial frames from one chunk to the next."""
+        carry = b''
+        output = None
+        while True:
+            chunk = yield output
+            if not chunk:
+                yield flush() if flush else None
+                return
+            data, carry = align(carry, chunk, frame_size)
+            if not data:
+                output = None
+                continue
+            samples = to_samples(data)
+            output = process(samples.reshape(-1, channels))
+            if not isinstance(output, bytes):
+                output = to_bytes(output)
+    return transform
+
+
+def _stream(process, channels=CHANNELS, flush=None):
+    """Return a streaming track that runs `process` on whole frames."""
+    require_numpy()
+    return Track(_frames(process, channels, flush), stream=True)
+
+
+def gain(factor=1.0, db=None):
+    """Scale the audio by `factor`, or by `db` decibels."""
+    np = require_numpy()
+    if db is not None:
+        factor = 10 ** (db / 20)
+    factor = np.float32(factor)
+    return _stream(lambda samples: samples * factor)
+
+
+def fade_in(seconds=2.0, curve='equal_power', rate=RATE):
+    """Fade in over the first `seconds`."""
+    if curve not in CURVES:
+        raise ValueError(f'unknown fade curve {curve!r}')
+    frames = max(int(seconds * rate), 1)
+    state = {'position': 0}
+
+    def process(samples):
+        """Scale the frames that fall inside the fade."""
+        start = state['position']
+        state['position'] += len(samples)
+        if start >= frames:
+            return samples.tobytes()
+        count = min(frames - start, len(samples))
+        samples = samples.astype('float32')
+        samples[:count] *= fade_curve(frames, curve)[start:start + count]
+        return samples
+    return _stream(process)
+
+
+def fade_out(seconds=2.0, curve='equal_power', rate=RATE,
+             channels=CHANNELS):
+    """Fade out over the last `seconds`, holding them back until the end."""
+    np = require_numpy()
+    if curve not in CURVES:
+        raise ValueError(f'unknown fade curve {curve!r}')
+    frame_size = channels * SAMPLE_WIDTH
+    hold = max(int(seconds * rate), 1) * frame_size
+    held = bytearray()
+
+    def process(samples):
+        """Pass on whatever is older than the fade."""
+        held.extend(samples.tobytes())
+        excess = len(held) - hold
+        if excess <= 0:
+            return b''
+        output = bytes(held[:excess])
+        del held[:excess]
+        return output
+
+    def flush():
+        """Fade what was held back."""
+        frames = len(held) // frame_size
+        if not frames:
+            return b''
+        samples = to_samples(held).reshape(-1, channels)
+        gains = fade_curve(frames, curve)[::-1]
+        return to_bytes(samples * gains.astype(np.float32))
+    return _stream(process, channels, flush)
+
+
+def to_mono():
+    """Mix stereo down to one channel."""
+    return _stream(lambda samples: samples.mean(axis=1, dtype='float32'))
+
+
+def to_stereo():
+    """Copy one channel to both sides."""
+    np = require_numpy()
+    return _stream(lambda samples: np.repeat(samples, 2, axis=1), channels=1)
+
+
+def resample(up=1, down=1, channels=CHANNELS):
+    """Change the sample rate by the integer ratio `up` / `down`.
+
+    Upsampling interpolates linearly between frames and holds the last
+    one at the end.  Downsampling averages each `down` frames, which also
+    filters out much of what would alias.  Either way `n` input frames
+    come out as ``ceil(n * up / down)``.  This is a cheap resampler for
+    exact ratios like 48k to 24k, not a replacement for a polyphase one.
+
+    """
+    np = require_numpy()
+    if up < 1 or down < 1:
+        raise ValueError('resample ratio must be positive integers')
+    steps = (np.arange(up, dtype=np.float32) / up)[None, :, None]
+    state = {'last': None, 'rest': np.zeros((0, channels), np.float32)}
+
+    def upsample(samples):
+        """Interpolate `up` frames for each input frame."""
+        samples = samples.astype(np.float32)
+        if up == 1:
+            return samples
+        extended = samples
+        if state['last'] is not None:
+            extended = np.concatenate([state['last'], samples])
+        state['last'] = samples[-1:]
+        start = extended[:-1, None, :]
+        step = (extended[1:] - extended[:-1])[:, None, :]
+        return (start + step * steps).reshape(-1, channels)
+
+    def downsample(samples, final=False):
+        """Average each `down` frames."""
+        if down == 1:
+            return samples
+        samples = np.concatenate([state['rest'], samples])
+        usable = len(samples) - len(samples) % down
+        state['rest'] = samples[usable:]
+        output = samples[:usable].reshape(-1, down, channels).mean(axis=1)
+        if final and len(state['rest']):
+            rest = state['rest'].mean(axis=0, keepdims=True)
+            output = np.concatenate([output, rest])
+        return output
+
+    def process(samples):
+        """Resample a chunk."""
+        return downsample(upsample(samples))
+
+    def flush():
+        """Hold the last frame and average what is left over."""
+        held = np.zeros((0, channels), np.float32)
+        if up > 1 and state['last'] is not None:
+            held = np.repeat(state['last'], up, axis=0)
+        return to_bytes(downsample(held, final=True))
+    return _stream(process, channels, flush)
+
+
+def clip(limit=1.0):
+    """Cut off peaks above `limit` of full scale."""
+    np = require_numpy()
+    peak = np.float32(limit * 32767)
+    return _stream(lambda samples: np.clip(samples, -peak, peak))
+
+
+def soft_clip(drive=1.0):
+    """Round off peaks with a tanh curve, harder with more `drive`."""
+    np = require_numpy()
+    drive = np.float32(drive)
+    scale = np.float32(32767 / np.tanh(drive))
+
+    def process(samples):
+        """Saturate a chunk."""
+        return np.tanh(samples * (drive / np.float32(32768))) * scale
+    return _stream(process)
+
+
+def dc_block(smoothing=0.99, channels=CHANNELS):
+    """Remove a DC offset by subtracting a slowly tracking mean.
+
+    The mean of each channel follows each chunk's mean by `smoothing`.
+
+    """
+    np = require_numpy()
+    state = {'mean': None}
+
+    def process(samples):
+        """Subtract the running mean from a chunk."""
+        mean = samples.mean(axis=0, dtype=np.float32)
+        if state['mean'] is None:
+            state['mean'] = mean
+        else:
+            state['mean'] = (smoothing * state['mean'] +
+                             (1 - smoothing) * mean).astype(np.float32)
+        return samples - state['mean']
+    return _stream(process, channels)
@@ -18,6 +18,7 @@ setup(
     ],
     entry_points={'console_scripts': ['reel=reel.cli:enter']},
     install_requires=['trio>=0.10.0'],
+    extras_require={'dsp': ['numpy']},
     zip_safe=False,
     packages=find_packages(),
     include_package_data=True,
@@ -12,7 +12,7 @@ import trio
 from trio import Path
 
 # import reel
-from reel import Reel
+from reel import Reel, Spool
 from reel.cmd import ffmpeg, sox
 
 
@@ -82,6 +82,33 @@ def audio_dest():
     return audio_dest_fn
 
 
+@pytest.fixture
+def tone():
+    """Return a factory of spools that output a constant s16le tone."""
+    def tone_fn(value, frames):
+        """Return a spool that outputs `frames` stereo frames of `value`."""
+        script = ' '.join([
+            'import struct, sys;',
+            f'sys.stdout.buffer.write(struct.pack("<2h", {value}, {value})',
+            f'* {frames})',
+        ])
+        return Spool(['python', '-c', script])
+    return tone_fn
+
+
+@pytest.fixture
+def feed():
+    """Return a function that streams chunks into a streamer's input."""
+    async def feed_fn(streamer, chunks):
+        """Send `chunks` to `streamer` and end its input."""
+        send_ch, receive_ch = trio.open_memory_channel(len(chunks))
+        async with send_ch:
+            for chunk in chunks:
+                await send_ch.send(chunk)
+        await streamer.receive_from_channel(receive_ch)
+    return feed_fn
+
+
 @pytest.fixture(params=['python -m reel.cli', 'reel'])
 def cli_cmd(request):
     """."""
@@ -0,0 +1,131 @@
+"""Tests for the reel.PCMCache class."""
+import os
+
+import trio
+import trio.testing
+
+from reel import Framer, PCMCache, Spool, Transport
+from reel._track import run_sync_in_thread
+
+
+def _counter(count, status=0):
+    """Return a spool that prints `count` numbers and exits with `status`."""
+    return Spool([
+        'python', '-c',
+        f'import sys; print(*range({count}), sep="\\n"); sys.exit({status})'
+    ])
+
+
+async def test_hit_and_miss(tmpdir):
+    """Play a miss from the source and a hit from the cache file."""
+    cache = PCMCache(tmpdir.join('pcm'))
+    key = cache.key('seq', 1000)
+    expected = '\n'.join(str(_) for _ in range(1000))
+
+    miss = cache.wrap(_counter(1000), key)
+    assert await Transport(miss).read() == expected
+    assert not miss.hit
+    assert key in cache
+    assert cache.size == os.path.getsize(cache.path(key))
+
+    hit = cache.wrap(_counter(1000), key)
+    assert await Transport(hit).read() == expected
+    assert hit.hit
+    assert hit.source.proc is None
+
+    # Relay a hit to the next process with sendfile.
+    hit = cache.wrap(_counter(1000), key)
+    assert await Transport(hit, Spool('cat')).read() == expected
+    assert hit.hit
+
+
+async def test_failed_source(tmpdir):
+    """Do not keep the output of a source that fails."""
+    cache = PCMCache(tmpdir)
+    key = cache.key('fail')
+    assert await Transport(cache.wrap(_counter(10, 1), key)).read()
+    assert key not in cache
+    assert not [_ for _ in os.listdir(tmpdir) if _.endswith('.part')]
+
+
+async def test_evict(tmpdir):
+    """Remove the least recently used entries to stay under budget."""
+    cache = PCMCache(tmpdir, max_bytes=5000)
+    for count in (500, 600, 700):
+        await Transport(cache.wrap(_counter(count), cache.key(count))).read()
+        if count == 600:
+            assert cache.lookup(cache.key(500))
+    assert cache.key(500) in cache
+    assert cache.key(600) not in cache
+    assert cache.key(700) in cache
+    assert cache.size <= 5000
+
+    # Entries survive a restart in the same order.
+    cache = PCMCache(tmpdir, max_bytes=5000)
+    assert len(cache) == 2
+
+
+async def test_concurrent_misses(tmpdir):
+    """Give two misses of the same key part files of their own."""
+    cache = PCMCache(tmpdir)
+    key = cache.key('seq', 2000)
+    assert cache.part_path(key) != cache.part_path(key)
+    expected = '\n'.join(str(_) for _ in range(2000))
+    results = []
+
+    async def play():
+        results.append(await Transport(cache.wrap(_counter(2000), key)).read())
+
+    async with trio.open_nursery() as nursery:
+        nursery.start_soon(play)
+        nursery.start_soon(play)
+    assert results == [expected, expected]
+    with open(cache.path(key), encoding='utf-8') as entry:
+        assert entry.read().strip() == expected
+
+
+async def test_follow_to_the_end(tmpdir, monkeypatch):
+    """Read the last chunk written while a follower was at the end."""
+    cache = PCMCache(tmpdir)
+    key = cache.key('follow')
+    send_ch, receive_ch = trio.open_memory_channel(0)
+    source = Framer(frame_size=1)
+    cached = cache.wrap(source, key)
+    at_end, gate = trio.Event(), trio.Event()
+    received = []
+
+    async def read_in_thread(read, max_bytes):
+        """Hold the first empty read until the gate opens."""
+        chunk = await run_sync_in_thread(read, max_bytes)
+        if not chunk and not at_end.is_set():
+            at_end.set()
+            await gate.wait()
+        return chunk
+    monkeypatch.setattr('reel._cache.run_sync_in_thread', read_in_thread)
+
+    async def play():
+        while True:
+            chunk = await cached.receive_some(4096)
+            if not chunk:
+                break
+            received.append(chunk)
+
+    async with trio.open_nursery() as nursery:
+        nursery.start_soon(source.receive_from_channel, receive_ch)
+        nursery.start_soon(cached.decode)
+        await send_ch.send(b'head')
+        await trio.testing.wait_all_tasks_blocked()
+
+        # Follow the part file and wait at its end.
+        cached.start(nursery)
+        assert cached.hit
+        nursery.start_soon(play)
+        await at_end.wait()
+
+        # Finish decoding before the empty read returns.
+        await send_ch.send(b'tail')
+        await send_ch.aclose()
+        await trio.testing.wait_all_tasks_blocked()
+        assert key in cache
+        gate.set()
+    assert b''.join(received) == b'headtail'
@@ -0,0 +1,55 @@
+"""Tests for buffered transport hops."""
+import pytest
+import trio
+
+from reel import Spool
+from reel._channel import open_channel
+
+
+async def test_block_on_bytes():
+    """Block the sender when the buffer holds too many bytes."""
+    send_ch, receive_ch = open_channel(max_chunks=10, max_bytes=8)
+    await send_ch.send(b'abcd')
+    await send_ch.send(b'efgh')
+    with pytest.raises(trio.WouldBlock):
+        send_ch.send_nowait(b'i')
+    assert await receive_ch.receive() == b'abcd'
+    await send_ch.send(b'i')
+    await send_ch.aclose()
+    assert [_ async for _ in receive_ch] == [b'efgh', b'i']
+
+
+async def test_drop_oldest():
+    """Make room for a new chunk by dropping the oldest one."""
+    send_ch, receive_ch = open_channel(2, policy='drop_oldest')
+    async with send_ch:
+        for chunk in (b'1', b'2', b'3', b'4'):
+            await send_ch.send(chunk)
+    assert [_ async for _ in receive_ch] == [b'3', b'4']
+    assert receive_ch.dropped == 2
+
+
+async def test_drop_newest():
+    """Drop a new chunk when the buffer is full."""
+    send_ch, receive_ch = open_channel(2, policy='drop_newest')
+    async with send_ch:
+        for chunk in (b'1', b'2', b'3', b'4'):
+            await send_ch.send(chunk)
+    assert [_ async for _ in receive_ch] == [b'1', b'2']
+    assert send_ch.dropped == 2
+
+
+async def test_unknown_policy():
+    """Reject a policy that does not exist."""
+    with pytest.raises(ValueError):
+        open_channel(policy='sometimes')
+    with pytest.raises(ValueError):
+        (Spool('cat') | Spool('cat')).buffer(policy='sometimes')
+
+
+async def test_transport_buffers():
+    """Run a transport with deep buffers on every hop."""
+    chain = Spool('seq 1 50000') | Spool('cat') | Spool('tail -n 1')
+    chain.buffer(chunks=64, max_bytes=1024**2)
+    chain.buffer(chunks=1, policy='block', hop=1)
+    assert await chain.read() == '50000'
@@ -0,0 +1,116 @@
+"""Tests for the reel.dsp filters."""
+import math
+
+import pytest
+import trio
+
+from reel import dsp
+
+np = pytest.importorskip('numpy')  # pylint: disable=invalid-name
+
+
+async def _run(track, samples, chunk_size=1001):
+    """Return the output of `track` for `samples` fed in odd chunks."""
+    data = np.asarray(samples, dtype='<i2').tobytes()
+    output = b''
+    async with trio.open_nursery() as nursery:
+        track.start(nursery)
+        send_ch, receive_ch = trio.open_memory_channel(0)
+
+        async def feed():
+            async with send_ch:
+                for start in range(0, len(data), chunk_size):
+                    await send_ch.send(data[start:start + chunk_size])
+
+        nursery.start_soon(feed)
+        nursery.start_soon(track.receive_from_channel, receive_ch)
+        while True:
+            chunk = await track.receive_some(65536)
+            if not chunk:
+                break
+            output += chunk
+    return np.frombuffer(output, dtype='<i2')
+
+
+def _stereo(left, right):
+    """Interleave two channels."""
+    return np.stack([left, right], axis=1).reshape(-1)
+
+
+async def test_gain():
+    """Scale and saturate."""
+    samples = _stereo(np.full(1000, 1000), np.full(1000, 30000))
+    output = (await _run(dsp.gain(2.0), samples)).reshape(-1, 2)
+    assert len(output) == 1000
+    assert (output[:, 0] == 2000).all()
+    assert (output[:, 1] == 32767).all()
+    output = await _run(dsp.gain(db=-6.0206), np.full(2000, 1000))
+    assert (abs(output - 500) <= 1).all()
+
+
+async def test_fades():
+    """Fade in at the start and out at the end."""
+    samples = np.full(2 * 4410, 10000)
+    output = (await _run(dsp.fade_in(0.05, 'linear'), samples))[::2]
+    assert output[0] < 100
+    assert (np.diff(output[:2205]) >= 0).all()
+    assert (output[2205:] == 10000).all()
+    output = (await _run(dsp.fade_out(0.05, 'linear'), samples))[::2]
+    assert len(output) == 4410
+    assert (output[:2205] == 10000).all()
+    assert (np.diff(output[2205:]) <= 0).all()
+    assert output[-1] < 100
+
+
+async def test_channels():
+    """Mix stereo down to mono and back."""
+    samples = _stereo(np.full(500, 100), np.full(500, 300))
+    mono = await _run(dsp.to_mono(), samples)
+    assert len(mono) == 500 and (mono == 200).all()
+    stereo = await _run(dsp.to_stereo(), mono)
+    assert len(stereo) == 1000 and (stereo == 200).all()
+
+
+async def test_resample():
+    """Double and halve the sample rate."""
+    ramp = np.arange(0, 2000, 2)
+    samples = _stereo(ramp, ramp)
+    up = (await _run(dsp.resample(up=2), samples)).reshape(-1, 2)
+    assert len(up) == 2000
+    assert (np.diff(up[:-1, 0]) == 1).all()
+    assert up[-1, 0] == ramp[-1]
+    down = (await _run(dsp.resample(down=2), up)).reshape(-1, 2)
+    assert len(down) == 1000
+    assert (abs(down[:, 0] - ramp) <= 1).all()
+    odd = await _run(dsp.resample(down=3), samples[:2 * 1000])
+    assert len(odd) == 2 * 334
+
+
+async def test_resample_length():
+    """Turn n frames into ceil(n * up / down), the last one included."""
+    for frames, up, down in [(1000, 3, 2), (1001, 3, 2), (7, 2, 3),
+                             (100, 2, 1), (1, 5, 1), (10, 1, 4)]:
+        ramp = np.arange(frames) * 10
+        output = await _run(dsp.resample(up, down), _stereo(ramp, ramp))
+        assert len(output) == 2 * math.ceil(frames * up / down)
+        if down == 1:
+            assert output[-1] == ramp[-1]
+
+
+async def test_clip():
+    """Cut off or round off peaks."""
+    samples = np.array([-32768, -16000, 0, 16000, 32767, 100])
+    hard = await _run(dsp.clip(0.25), samples)
+    assert list(hard) == [-8192, -8192, 0, 8192, 8192, 100]
+    soft = await _run(dsp.soft_clip(2.0), samples)
+    assert soft[2] == 0 and soft[4] == 32767
+    assert (np.diff(soft[:5]) > 0).all()
+    assert soft[3] > 16000
+
+
+async def test_dc_block():
+    """Remove a constant offset."""
+    samples = np.full(20000, 5000) + np.tile([100, 100, -100, -100], 5000)
+    output = await _run(dsp.dc_block(), samples)
+    assert len(output) == 20000
+    assert abs(output.mean()) < 50
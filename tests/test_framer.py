@@ -0,0 +1,60 @@
+"""Tests for cutting streams into whole frames."""
+import trio
+
+from reel import Framer, Reel, Spool, Transport
+from reel._pcm import align
+
+
+def _printf(*parts):
+    """Return a spool that prints `parts` in separate writes."""
+    script = ('import sys, time\n'
+              f'for part in {parts!r}:\n'
+              '    sys.stdout.buffer.write(part)\n'
+              '    sys.stdout.flush()\n'
+              '    time.sleep(0.05)\n')
+    return Spool(['python', '-c', script])
+
+
+def test_align():
+    """Carry partial frames and leave aligned chunks alone."""
+    chunk = b'abcdefgh'
+    frames, carry = align(b'', chunk, 4)
+    assert frames is chunk and carry == b''
+    assert align(b'', b'abcdef', 4) == (b'abcd', b'ef')
+    assert align(b'ef', b'g', 4) == (b'', b'efg')
+    assert align(b'efg', b'hijklm', 4) == (b'efghijkl', b'm')
+    view = memoryview(b'abcdef')
+    frames, carry = align(b'', view, 4)
+    assert isinstance(frames, memoryview) and bytes(frames) == b'abcd'
+
+
+async def test_framer():
+    """Pass on whole frames and drop a partial last frame."""
+    framer = Framer(4)
+    send_ch, receive_ch = trio.open_memory_channel(4)
+    async with send_ch:
+        for chunk in (b'abc', b'defghi', b'jklmnopq', b'rs'):
+            await send_ch.send(chunk)
+    chunks = []
+    async with trio.open_nursery() as nursery:
+        nursery.start_soon(framer.receive_from_channel, receive_ch)
+        while True:
+            chunk = await framer.receive_some(6)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    assert chunks == [b'abcd', b'efgh', b'ijkl', b'mnop']
+
+
+async def test_transport_framing():
+    """Frame the hops of a transport."""
+    transport = Transport(_printf(b'abc', b'defgh', b'ij'), Spool('cat'))
+    framed = transport.framing(4, hop=1)
+    assert framed is transport
+    assert await transport.read(text=False) == b'abcdefgh'
+
+
+async def test_reel_framing():
+    """Drop the partial frame at the end of a track."""
+    reel = Reel([_printf(b'abcde', b'fg'), _printf(b'hijk')]).framing(4)
+    assert await Transport(reel).read(text=False) == b'abcdhijk'
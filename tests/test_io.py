@@ -2,6 +2,8 @@
 # pylint: disable=W0611, W0613, W0621
 import logging
 
+import trio
+
 import reel
 
 
@@ -64,3 +66,65 @@ async def test_play_neil_with_pipes(audio_dest, audio_uri):  # noqa: F811
     ]])
     async with playlist | audio_dest() as player:
         await player.play()
+
+
+async def test_kernel_pipes():
+    """Connect neighboring spools with an os pipe instead of a relay."""
+    read_file = reel.Spool(f'head -n 1000 {__file__}')
+    find_it = reel.Spool('grep kernel_pipes')
+    async with (read_file | find_it).kernel_pipes() as out:
+        lines = await out.readlines()
+        assert read_file.proc.stdout is None
+        assert find_it.proc.stdin is None
+        assert lines
+        for line in lines:
+            assert 'kernel_pipes' in line
+
+
+async def test_stream_output():
+    """Iterate over the output of a transport as it arrives."""
+    total = 0
+    zeros = reel.Transport(reel.Spool('head -c 300000 /dev/zero'))
+    async with zeros.stream() as chunks:
+        async for chunk in chunks:
+            assert chunk.count(0) == len(chunk)
+            total += len(chunk)
+    assert total == 300000
+    assert zeros.is_done
+
+
+async def test_stream_break_early():
+    """Cancel the transport when the consumer stops reading."""
+    spool = reel.Spool('yes')
+    transport = reel.Transport(spool)
+    with trio.fail_after(5):
+        async with transport.stream() as chunks:
+            async for chunk in chunks:
+                assert chunk
+                break
+    assert transport.is_done
+    assert spool.proc.returncode is not None
+
+
+async def test_stream_lines():
+    """Iterate over lines split across chunks and multibyte characters."""
+    script = ' '.join([
+        'import sys, time;',
+        "sys.stdout.buffer.write('ab\\nc\\u00e9'.encode()[:-1]);",
+        'sys.stdout.flush(); time.sleep(0.1);',
+        "sys.stdout.buffer.write(b'\\xa9\\nlast')",
+    ])
+    transport = reel.Transport(reel.Spool(['python', '-c', script]))
+    async with transport.lines() as lines:
+        assert [_ async for _ in lines] == ['ab', 'cé', 'last']
+
+
+async def test_kernel_pipe_size():
+    """Size the pipe shared by two spools."""
+    seq = reel.Spool('seq 1 10000').pipe_size(256 * 1024)
+    tail = reel.Spool('tail -n 1')
+    async with (seq | tail).kernel_pipes() as out:
+        assert await out.read() == '10000'
+        if seq.pipe_sizes['stdout']:
+            assert seq.pipe_sizes['stdout'] >= 256 * 1024
+            assert tail.pipe_sizes['stdin'] == seq.pipe_sizes['stdout']
@@ -0,0 +1,73 @@
+"""Tests for the reel.Loudness class."""
+import math
+
+from reel import Loudness
+from reel._loudness import Measurement, parse_report
+
+REPORT = '''[Parsed_loudnorm_0 @ 0x5581]
+{
+    "input_i" : "-23.54",
+    "input_tp" : "-7.89",
+    "input_lra" : "5.40",
+    "input_thresh" : "-34.12",
+    "output_i" : "-16.08",
+    "output_tp" : "-1.50",
+    "output_lra" : "4.90",
+    "output_thresh" : "-26.58",
+    "normalization_type" : "dynamic",
+    "target_offset" : "0.08"
+}
+'''
+
+
+def test_parse_report():
+    """Read the measurements from the loudnorm report on stderr."""
+    assert parse_report(REPORT) == Measurement(
+        -23.54, -7.89, 5.4, -34.12, 0.08
+    )
+    assert parse_report('no report') is None
+    assert parse_report('{"input_i": "-20"}') is None
+
+
+def test_gain(tmp_path):
+    """Bring tracks to the target without clipping."""
+    loudness = Loudness(tmp_path, target=-16.0, true_peak=-1.5)
+    quiet = Measurement(-23.5, -7.9, 5.4, -34.1, 0.1)
+    assert loudness.gain(quiet) == 6.4
+    assert loudness.filters(quiet) == 'volume=6.40dB'
+    precise = loudness.filters(quiet, precise=True)
+    assert precise.startswith('loudnorm=I=-16.0:TP=-1.5:LRA=11.0:')
+    assert 'measured_I=-23.5' in precise and precise.endswith('linear=true')
+    peaky = Measurement(-23.5, -3.0, 5.4, -34.1, 0.1)
+    assert loudness.gain(peaky) == 1.5
+    silent = Measurement(-math.inf, -math.inf, 0, -70, 0)
+    assert loudness.gain(silent) == 0.0
+    assert loudness.filters(silent, precise=True) == 'volume=0.00dB'
+
+
+async def test_cached_measurements(tmp_path):
+    """Measure by content, and only once."""
+    first = tmp_path / 'one.mp3'
+    first.write_bytes(b'track one')
+    copy = tmp_path / 'copy.mp3'
+    copy.write_bytes(b'track one')
+    other = tmp_path / 'two.mp3'
+    other.write_bytes(b'track two')
+    loudness = Loudness(tmp_path / 'cache')
+    key = await loudness.key(first)
+    assert await loudness.key(copy) == key
+    assert await loudness.key(other) != key
+    assert await Loudness(tmp_path / 'cache', target=-14).key(first) != key
+
+    measurement = Measurement(-20.0, -2.0, 6.0, -30.0, 0.0)
+    loudness.store(key, measurement)
+    loudness.store(key, measurement)
+    assert [path.name for path in (tmp_path / 'cache').iterdir()] == [
+        f'{key}.json'
+    ]
+    again = Loudness(tmp_path / 'cache')
+    assert await again.measure(copy) == measurement
+    results = await again.measure_all([first, copy], workers=2)
+    assert results == {first: measurement, copy: measurement}
+    spool = await again.read(str(first))
+    assert '-af volume=0.50dB' in repr(spool)
@@ -0,0 +1,53 @@
+"""Tests for the Mixer class."""
+import pytest
+import trio
+
+from reel import Mixer, MixSettings, Spool, Transport
+
+np = pytest.importorskip('numpy')
+
+
+async def _mix(mixer):
+    """Return the mixed output as int16 samples."""
+    output = await Transport(mixer).read(text=False)
+    return np.frombuffer(output, dtype='<i2')
+
+
+async def test_mix_two_sources(tone):
+    """Sum two sources with gains."""
+    mixer = Mixer([tone(1000, 5000), tone(2000, 5000)], gains=[1.0, 0.5])
+    samples = await _mix(mixer)
+    assert len(samples) == 10000
+    assert (samples == 2000).all()
+
+
+async def test_mix_saturates(tone):
+    """Clip the sum at the int16 limits."""
+    samples = await _mix(Mixer([tone(30000, 100), tone(30000, 100)]))
+    assert (samples == 32767).all()
+    samples = await _mix(Mixer([tone(-30000, 100), tone(-30000, 100)]))
+    assert (samples == -32768).all()
+
+
+async def test_mix_pads_short_source(tone):
+    """Fill in silence after a source ends."""
+    samples = await _mix(Mixer([tone(100, 8000), tone(10, 2000)]))
+    assert len(samples) == 16000
+    assert (samples[:4000] == 110).all()
+    assert (samples[-4000:] == 100).all()
+
+
+async def test_mix_silent_source(tone):
+    """Fill in silence for a source that never writes."""
+    silent = Spool(['sleep', '5'])
+    mixer = Mixer(
+        [tone(100, 2000), silent], settings=MixSettings(startup=0.5)
+    )
+    async with trio.open_nursery() as nursery:
+        mixer.start(nursery)
+        with trio.fail_after(1):
+            chunk = await mixer.receive_some(8000)
+        silent.proc.kill()
+    samples = np.frombuffer(chunk, dtype='<i2')
+    assert len(samples) == 4000
+    assert (samples == 100).all()
@@ -0,0 +1,64 @@
+"""Tests for collecting output."""
+from reel import Spool
+from reel._output import Output
+
+
+def test_output_collects_chunks():
+    """Collect chunks and read them back without copying."""
+    output = Output()
+    assert not output
+    for chunk in (b'one ', b'two ', b'three'):
+        output.write(chunk)
+    assert len(output) == 13
+    assert output.getvalue() == b'one two three'
+    assert output.decode() == 'one two three'
+    with output.getbuffer() as view:
+        assert view[4:7] == b'two'
+
+
+async def test_spool_output():
+    """Read the output of a spool as a buffer."""
+    seq = Spool('seq 1 1000')
+    assert (await seq.run()).split('\n')[-1] == '1000'
+    assert seq.output.getvalue() == seq.stdout
+
+
+def test_output_spills_to_file(tmp_path):
+    """Move the data to a file after a threshold."""
+    output = Output(spill_at=10, spill_dir=tmp_path)
+    output.write(b'0123456789')
+    assert not output.spilled
+    output.write(b'abc')
+    assert output.spilled
+    assert len(output) == 13
+    assert output.getvalue() == b'0123456789abc'
+    with output.open() as spilled:
+        assert spilled.read(4) == b'0123'
+    with output.getbuffer() as view:
+        assert view[10:] == b'abc'
+    output.close()
+    assert not output
+
+
+async def test_spool_run_without_cap():
+    """Read more than one buffer of output from a spool."""
+    seq = Spool('seq 1 100000')
+    assert (await seq.run()).split('\n')[-1] == '100000'
+
+
+async def test_spool_spill():
+    """Spill a large output to a cache file."""
+    zeros = Spool('head -c 1000000 /dev/zero').spill(threshold=1024)
+    output = await zeros.run(text=False)
+    assert output.spilled
+    assert len(output) == 1000000
+    with output.getbuffer() as view:
+        assert view[-1] == 0
+
+
+async def test_transport_spill():
+    """Spill the output of a transport to a cache file."""
+    zeros = Spool('head -c 100000 /dev/zero') | Spool('cat')
+    output = await zeros.spill(threshold=1024).read(text=False)
+    assert output.spilled
+    assert len(output) == 100000
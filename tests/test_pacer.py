@@ -0,0 +1,46 @@
+"""Tests for the reel.Pacer class."""
+import trio
+
+from reel import Pacer
+
+
+async def test_realtime(autojump_clock, feed):
+    """Let audio through at the rate it plays, after a burst."""
+    assert autojump_clock
+    pacer = Pacer(rate=1000, frame_size=4, burst=0.5)
+    times = []
+    async with trio.open_nursery() as nursery:
+        nursery.start_soon(feed, pacer, [b'\0' * 4000] * 5)
+        start = trio.current_time()
+        while True:
+            chunk = await pacer.receive_some(2000)
+            if not chunk:
+                break
+            times.append(trio.current_time() - start)
+
+    # Each half second chunk is due half a second after the last one,
+    # and the burst lets each one out half a second early.
+    assert times == [0, 0, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0]
+    assert pacer.position == 5.0
+
+
+async def test_resync(autojump_clock):
+    """Start the clock over after the input stalls."""
+    assert autojump_clock
+    pacer = Pacer(rate=1000, frame_size=4, burst=0, max_lag=1.0)
+    send_ch, receive_ch = trio.open_memory_channel(0)
+    async with trio.open_nursery() as nursery:
+        nursery.start_soon(pacer.receive_from_channel, receive_ch)
+        async with send_ch:
+            await send_ch.send(b'\0' * 4000)
+            assert await pacer.receive_some(4000)
+            await trio.sleep(5)
+            await send_ch.send(b'\0' * 8000)
+            start = trio.current_time()
+            assert await pacer.receive_some(4000)
+            assert trio.current_time() == start
+            assert pacer.resyncs == 1
+
+            # Back on a clock that started with the stalled chunk.
+            assert await pacer.receive_some(4000)
+            assert trio.current_time() - start == 1.0
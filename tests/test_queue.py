@@ -0,0 +1,51 @@
+"""Tests for the reel.PlayQueue class."""
+import random
+
+import pytest
+
+from reel import PlayQueue
+
+
+def test_order():
+    """Play higher priorities first, then in the order queued."""
+    queue = PlayQueue(['a', 'b', 'c'])
+    queue.append('d', priority=1)
+    queue.insert_next('e')
+    assert list(queue) == ['e', 'd', 'a', 'b', 'c']
+    assert queue.head(3) == ['e', 'd', 'a']
+    queue.bump('c', 2)
+    queue.remove('d')
+    assert 'd' not in queue
+    assert queue.priority('c') == 2
+    assert [queue.pop() for _ in range(len(queue))] == ['c', 'e', 'a', 'b']
+    assert queue.pop() is None
+    assert not queue
+    with pytest.raises(KeyError):
+        queue.bump('a', 1)
+
+
+def test_shuffle():
+    """Shuffle the tracks within each priority."""
+    queue = PlayQueue(range(100))
+    queue.append('first', priority=1)
+    changes = []
+    queue.subscribe(lambda: changes.append(True))
+    queue.shuffle(random.Random(0))
+    assert changes
+    tracks = list(queue)
+    assert tracks[0] == 'first'
+    assert sorted(tracks[1:]) == list(range(100))
+    assert tracks[1:] != list(range(100))
+    assert [queue.pop() for _ in range(101)] == tracks
+
+
+def test_compact():
+    """Removed entries do not pile up in the heap."""
+    queue = PlayQueue(range(1000))
+    for track in range(0, 1000, 2):
+        queue.remove(track)
+    for track in range(1, 1000, 4):
+        queue.bump(track, 1)
+    assert len(queue) == 500
+    assert len(queue._heap) <= 2 * 500 + 16  # pylint: disable=W0212
+    assert queue.head(2) == [1, 5]
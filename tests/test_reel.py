@@ -1,10 +1,11 @@
 """Tests for the reel.Reel class."""
 import logging
+import struct
 
 import pytest
 import trio
 
-from reel import Reel, Spool
+from reel import PCMCache, PlayQueue, Reel, Spool, Transport
 from reel.cmd import ffmpeg
 
 LOG = logging.getLogger(__name__)
@@ -250,3 +251,218 @@ async def test_reel_daemon_playing(neil_reel, audio_dest):
                     break
                 await trio.sleep(0)
     assert got_here and got_there
+
+
+async def test_crossfade(tone):
+    """Blend the end of each track into the start of the next."""
+    np = pytest.importorskip('numpy')
+    playlist = Reel([tone(1000, 2000), tone(1000, 2000), tone(0, 2000)])
+    playlist.crossfade(seconds=0.01, curve='linear')
+    output = await Transport(playlist).read(text=False)
+    samples = np.frombuffer(output, dtype='<i2').reshape(-1, 2)
+
+    # Each fade overlaps 441 frames.
+    assert len(samples) == 6000 - 2 * 441
+    assert (abs(samples[:3118] - 1000) <= 1).all()
+    fade_out = samples[3118:3118 + 441, 0]
+    assert (np.diff(fade_out) <= 0).all()
+    assert fade_out[0] > 990 and fade_out[-1] < 10
+    assert (samples[-1000:] == 0).all()
+
+
+async def test_read_ahead(tone):
+    """Drain upcoming tracks into a bounded buffer while playing."""
+    values = [1, 2, 3, 4, 5]
+    playlist = Reel([tone(value, 20000) for value in values])
+    playlist.read_ahead(tracks=2, seconds=1, max_bytes=65536)
+    upcoming = []
+
+    def checkpoint(track):
+        assert track == playlist.current_track
+        after = playlist.tracks[playlist.tracks.index(track) + 1:]
+        upcoming.append(sum(later.proc is not None for later in after))
+
+    playlist.announce_to = checkpoint
+    output = await Transport(playlist).read(text=False)
+    assert output == b''.join(
+        struct.pack('<2h', value, value) * 20000 for value in values
+    )
+    assert upcoming == [2, 2, 2, 1, 0]
+
+
+async def test_lazy_tracks(tone):
+    """Pull tracks from a generator only as far as the next track."""
+    pulled = []
+
+    def playlist():
+        for value in range(1, 6):
+            pulled.append(value)
+            yield tone(value, 1000)
+
+    def checkpoint(track):
+        # Only the playing track and the one on deck have been pulled.
+        played.append(track)
+        assert len(pulled) <= len(played) + 1
+        assert reel.tracks == [track, reel.next_track][:len(reel.tracks)]
+
+    played = []
+    reel = Reel(playlist(), announce_to=checkpoint)
+    output = await Transport(reel).read(text=False)
+    assert output == b''.join(
+        struct.pack('<2h', value, value) * 1000 for value in range(1, 6)
+    )
+    assert len(played) == 5
+
+
+async def test_async_lazy_tracks(tone):
+    """Pull tracks from an async generator as the reel plays."""
+
+    async def playlist():
+        for value in range(1, 4):
+            await trio.sleep(0)
+            yield tone(value, 1000)
+
+    reel = Reel(playlist())
+    assert str(reel) == 'Reel([  ... ])'
+    output = await Transport(reel).read(text=False)
+    assert output == b''.join(
+        struct.pack('<2h', value, value) * 1000 for value in range(1, 4)
+    )
+    assert not reel.tracks
+
+
+async def test_play_queue(tone):
+    """Change the queue of a reel while it plays."""
+    tracks = {value: tone(value, 1000) for value in range(1, 6)}
+    queue = PlayQueue([tracks[1], tracks[2], tracks[3]])
+    reel = Reel(queue)
+    played = []
+
+    def checkpoint(track):
+        played.append(track)
+        if track is tracks[1]:
+            # The prefetched next track is left alone.
+            assert reel.next_track is tracks[2]
+            queue.append(tracks[4])
+            assert reel.next_track is tracks[2]
+
+            # Play a request next and drop a queued track.
+            queue.insert_next(tracks[5])
+            queue.remove(tracks[3])
+            assert reel.next_track is tracks[5]
+            assert tracks[2].proc
+
+    reel.announce_to = checkpoint
+    output = await Transport(reel).read(text=False)
+    order = [1, 5, 2, 4]
+    assert played == [tracks[value] for value in order]
+    assert output == b''.join(
+        struct.pack('<2h', value, value) * 1000 for value in order
+    )
+
+
+async def test_play_queue_remove_off_deck(tone):
+    """Close a prefetched track removed after it fell off deck."""
+    tracks = {value: tone(value, 1000) for value in range(1, 5)}
+    queue = PlayQueue([tracks[1], tracks[2], tracks[3]])
+    reel = Reel(queue)
+
+    def checkpoint(track):
+        if track is tracks[1]:
+            assert reel.next_track is tracks[2]
+            queue.insert_next(tracks[4])
+            assert reel.next_track is tracks[4]
+            queue.remove(tracks[2])
+
+    reel.announce_to = checkpoint
+    output = await Transport(reel).read(text=False)
+    assert output == b''.join(
+        struct.pack('<2h', value, value) * 1000 for value in (1, 4, 3)
+    )
+    assert tracks[2].proc.returncode is not None
+
+
+async def test_announcement_bus(tone):
+    """Announce track changes without waiting for slow subscribers."""
+    reel = Reel([tone(value, 1000) for value in range(1, 6)])
+    fast = []
+    slow = []
+    done = trio.Event()
+
+    async def slow_subscriber(track):
+        await done.wait()
+        slow.append(track)
+
+    def last_track(track):
+        fast.append(track)
+        if len(fast) == len(reel.tracks):
+            done.set()
+
+    reel.bus.subscribe(last_track)
+    subscription = reel.bus.subscribe(slow_subscriber, policy='coalesce')
+    output = await Transport(reel).read(text=False)
+    assert len(output) == 5 * 4000
+    assert fast == reel.tracks
+
+    # The slow subscriber only got the first and last tracks.
+    assert slow == [reel.tracks[0], reel.tracks[-1]]
+    assert subscription.dropped == 3
+
+
+async def test_subscribe_after_end(tone):
+    """Refuse new subscribers once the announcement bus is closed."""
+    reel = Reel([tone(1, 10)])
+    await Transport(reel).read(text=False)
+    with pytest.raises(trio.ClosedResourceError):
+        reel.bus.subscribe(print)
+
+
+async def test_lookahead(tmpdir, tone):
+    """Decode upcoming tracks into the cache while the first one plays."""
+    cache = PCMCache(tmpdir)
+    values = range(1, 7)
+    tracks = [cache.wrap(tone(value, 20000), cache.key(value))
+              for value in values]
+    playlist = Reel(tracks).lookahead(tracks=3, workers=2)
+    output = await Transport(playlist).read(text=False)
+    assert output == b''.join(
+        struct.pack('<2h', value, value) * 20000 for value in values
+    )
+
+    # The tracks on deck at the start were played from the source, and
+    # the first one after them was decoded ahead of time.
+    assert [track.hit for track in tracks[:3]] == [False, False, True]
+    assert len(cache) == 6
+
+
+async def test_lookahead_close(tmpdir):
+    """Stop the tracks that are decoding ahead when the reel closes."""
+    cache = PCMCache(tmpdir)
+    tracks = [cache.wrap(Spool('yes'), cache.key(_)) for _ in range(6)]
+    playlist = Reel(iter(tracks)).lookahead(tracks=3, workers=3)
+    with trio.fail_after(5):
+        async with trio.open_nursery() as nursery:
+            playlist.start(nursery)
+            assert await playlist.receive_some(4096)
+            await trio.sleep(0.2)
+            await playlist.aclose()
+    for track in tracks[2:5]:
+        assert track.source.proc.returncode is not None
+    assert not [_ for _ in tmpdir.listdir() if _.ext == '.part']
+
+
+async def test_lookahead_failure(tmpdir, tone):
+    """Play a track from its source when decoding it ahead fails."""
+    cache = PCMCache(tmpdir)
+    tracks = [cache.wrap(tone(value, 1000), cache.key(value))
+              for value in range(1, 5)]
+
+    async def fail():
+        raise OSError('no space left')
+    tracks[2].decode = fail
+    playlist = Reel(tracks).lookahead(tracks=2, workers=1)
+    output = await Transport(playlist).read(text=False)
+    assert output == b''.join(
+        struct.pack('<2h', value, value) * 1000 for value in range(1, 5)
+    )
+    assert not tracks[2].hit
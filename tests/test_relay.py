@@ -0,0 +1,112 @@
+"""Tests for the file descriptor relay."""
+import os
+import sys
+
+import trio
+
+from reel import Reel, Spool, Track
+from reel._relay import BufferPool, Relay
+
+
+def _pipe():
+    """Return a non-blocking os pipe."""
+    read_fd, write_fd = os.pipe()
+    os.set_blocking(read_fd, False)
+    os.set_blocking(write_fd, False)
+    return read_fd, write_fd
+
+
+async def test_relay_between_pipes():
+    """Move bytes from one pipe to another."""
+    src_read, src_write = _pipe()
+    dst_read, dst_write = _pipe()
+    os.write(src_write, b'rutabaga')
+    os.close(src_write)
+    assert await Relay().relay(src_read, dst_write) == 8
+    assert os.read(dst_read, 100) == b'rutabaga'
+    for pipe_fd in (src_read, dst_read, dst_write):
+        os.close(pipe_fd)
+
+
+async def test_relay_limit():
+    """Stop relaying after a limit."""
+    src_read, src_write = _pipe()
+    dst_read, dst_write = _pipe()
+    os.write(src_write, b'x' * 1000)
+    assert await Relay(buffsize=64).relay(src_read, dst_write, 100) == 100
+    assert os.read(dst_read, 1000) == b'x' * 100
+    for pipe_fd in (src_read, src_write, dst_read, dst_write):
+        os.close(pipe_fd)
+
+
+async def test_relay_cancel():
+    """Cancel a relay that is waiting for data."""
+    src_read, src_write = _pipe()
+    dst_read, dst_write = _pipe()
+    with trio.move_on_after(0.1) as cancel_scope:
+        await Relay().relay(src_read, dst_write)
+    assert cancel_scope.cancelled_caught
+    for pipe_fd in (src_read, src_write, dst_read, dst_write):
+        os.close(pipe_fd)
+
+
+async def test_zero_copy_reel():
+    """Relay a reel of spools to another spool."""
+    playlist = Reel([Spool('echo one'), Spool('echo two')])
+    async with (playlist | Spool('cat')).zero_copy() as out:
+        assert await out.readlines() == ['one', 'two']
+
+
+async def test_pipe_size():
+    """Ask the kernel for bigger pipes."""
+    if sys.platform.startswith('linux'):
+        cat = Spool('cat').pipe_size(256 * 1024)
+        async with cat:
+            async with trio.open_nursery() as nursery:
+                cat.start(nursery)
+                assert cat.pipe_sizes['stdin'] >= 256 * 1024
+                assert cat.pipe_sizes['stdout'] >= 256 * 1024
+                await cat.proc.stdin.aclose()
+
+
+async def test_buffer_pool():
+    """Lend out buffers and wait for one to come back."""
+    pool = BufferPool(1, 16)
+    view = await pool.acquire()
+    assert len(view) == 16 and not pool
+    with trio.move_on_after(0.1) as cancel_scope:
+        await pool.acquire()
+    assert cancel_scope.cancelled_caught
+    pool.release(view[:4])
+    assert len(pool) == 1
+    assert len(await pool.acquire()) == 16
+
+
+async def test_receive_into():
+    """Read spools and reels into a buffer."""
+    buffer = bytearray(4)
+    spool = Spool('printf rutabaga')
+    async with trio.open_nursery() as nursery:
+        spool.start(nursery)
+        assert await spool.receive_into(buffer) == 4
+        assert buffer == b'ruta'
+        await spool.aclose()
+    playlist = Reel([Spool('printf one'), Spool('printf two')])
+    result = b''
+    async with trio.open_nursery() as nursery:
+        playlist.start(nursery)
+        while True:
+            count = await playlist.receive_into(buffer)
+            if not count:
+                break
+            result += buffer[:count]
+    assert result == b'onetwo'
+
+
+async def test_buffer_pool_transport():
+    """Relay hops through pooled buffers."""
+    playlist = Reel([Spool('echo one'), Spool('echo two')])
+    upper = Track(bytes.upper, stream=True)
+    transport = playlist | Spool('cat') | upper | Spool('cat')
+    async with transport.buffer_pool(2) as out:
+        assert await out.readlines() == ['ONE', 'TWO']
@@ -1,7 +1,11 @@
 """Unit tests for spools."""
+import os
+
+import pytest
 import trio
 
-from reel import Spool
+from reel import ChunkSize, Daemon, Spool
+from reel._daemon import MAX_STDOUT
 
 
 async def test_spool_send_chunk():
@@ -11,3 +15,51 @@ async def test_spool_send_chunk():
         async with trio.open_nursery() as nursery:
             now.start(nursery)
             assert now.pid
+
+
+def test_chunk_size_policies():
+    """Pick read sizes that are fixed, frame aligned or adaptive."""
+    assert ChunkSize.fixed(1000).size == 1000
+    assert ChunkSize.frames(100).size == 400
+    assert ChunkSize(1001, frame=4).size == 1000
+
+    adaptive = ChunkSize.adaptive(minimum=1024, maximum=4096)
+    adaptive.update(1024)
+    adaptive.update(2048)
+    assert adaptive.size == 4096
+    adaptive.update(4096)
+    assert adaptive.size == 4096
+    adaptive.update(10)
+    assert adaptive.size == 2048
+    assert adaptive.copy().size == 2048
+
+
+async def test_transport_chunking():
+    """Give every spool in a transport its own read size policy."""
+    first, second = Spool('seq 1 20000'), Spool('cat')
+    chain = (first | second).chunking(ChunkSize.adaptive(512, 8192))
+    assert (await chain.read()).endswith('20000')
+    assert first.chunk_size is not second.chunk_size
+    assert second.chunk_size.size > 512
+
+
+async def test_spawn_launcher():
+    """Launch a spool with posix_spawn where it is available."""
+    spool = Spool('echo spawned').launcher()
+    assert await spool.run() == 'spawned'
+    assert os.path.isabs(spool.proc.args[0])
+    piped = Spool('echo piped').launcher() | Spool('tr a-z A-Z').launcher()
+    assert await piped.read() == 'PIPED'
+    with pytest.raises(ValueError):
+        Spool('echo').launcher('vfork')
+
+
+async def test_daemon_stdout_is_bounded():
+    """Keep reading a chatty daemon without keeping all of its output."""
+    async with trio.open_nursery() as nursery:
+        daemon = Daemon('yes')
+        await nursery.start(daemon.launch, nursery)
+        await trio.sleep(0.2)
+        assert len(daemon.stdout) == MAX_STDOUT
+        assert daemon.proc.returncode is None
+        await daemon.aclose()
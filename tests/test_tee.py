@@ -0,0 +1,51 @@
+"""Tests for the Tee class."""
+import pytest
+import trio
+
+from reel import Spool, Tee
+
+
+def _to_file(path):
+    """Return a spool that writes stdin to a file."""
+    return Spool(['sh', '-c', f'cat > {path}'])
+
+
+async def test_tee_copies_to_every_sink(tmp_path):
+    """Read the source once and copy it to each sink."""
+    paths = [tmp_path / f'{_}.txt' for _ in range(3)]
+    tee = Tee([_to_file(path) for path in paths], max_chunks=4)
+    async with Spool('seq 1 20000') | tee as player:
+        await player.play()
+    expected = '\n'.join(str(_) for _ in range(1, 20001)) + '\n'
+    for path in paths:
+        assert await trio.Path(path).read_text() == expected
+
+
+async def test_tee_disconnects_slow_sink(tmp_path):
+    """Disconnect a sink that falls behind without stalling the others."""
+    path = tmp_path / 'fast.bin'
+    tee = Tee()
+    tee.add(_to_file(path))
+    slow = Spool(['sh', '-c', 'sleep 0.5; cat > /dev/null'])
+    tee.add(slow, max_chunks=1, policy='disconnect')
+    with trio.fail_after(5):
+        async with Spool('head -c 4000000 /dev/zero') | tee as player:
+            await player.play()
+    assert (await trio.Path(path).stat()).st_size == 4000000
+    assert tee.disconnected == [slow]
+
+
+async def test_tee_discards_sink_output(tmp_path):
+    """Keep a sink that writes to stdout from filling its pipe."""
+    path = tmp_path / 'copy.bin'
+    tee = Tee([Spool('cat'), _to_file(path)])
+    with trio.fail_after(5):
+        async with Spool('head -c 2000000 /dev/zero') | tee as player:
+            await player.play()
+    assert (await trio.Path(path).stat()).st_size == 2000000
+
+
+async def test_tee_unknown_policy():
+    """Reject a policy that does not exist."""
+    with pytest.raises(ValueError):
+        Tee([Spool('cat')], policy='sometimes')
@@ -1,11 +1,15 @@
 """Test for the Track class."""
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import threading
+import time
 
 import trio
 
 from reel import (
     Spool, Streamer, Track, Transport
 )
+from reel._track import wait_for_future
 
 LOG = logging.getLogger(__name__)
 
@@ -39,3 +43,94 @@ async def test_stream_through_track():
     """Stream some data through a Track."""
     async with Spool('cat') | Track(lambda _: _.upper()) as echo_up:
         assert await echo_up.read('this') == 'THIS'
+
+
+async def test_stream_callable():
+    """Transform each chunk of a long stream with a callable."""
+    upper = Track(lambda _: _.upper(), stream=True)
+    async with Spool('seq -f line%g 10000') | upper as transport:
+        lines = await transport.readlines()
+    assert len(lines) == 10000
+    assert lines[-1] == 'LINE10000'
+
+
+async def test_stream_generator():
+    """Keep state across chunks in a generator and flush it at the end."""
+
+    def count_lines():
+        total = 0
+        output = None
+        while True:
+            chunk = yield output
+            if not chunk:
+                yield str(total).encode()
+                return
+            total += chunk.count(b'\n')
+            output = None
+
+    counter = Track(count_lines, stream=True)
+    async with Spool('seq 10000') | counter as transport:
+        assert await transport.read() == '10000'
+
+
+async def test_stream_async_generator():
+    """Regroup chunks into lines with an async generator."""
+
+    async def reverse_lines(chunks):
+        partial = b''
+        async for chunk in chunks:
+            partial += chunk
+            *lines, partial = partial.split(b'\n')
+            for line in lines:
+                yield line[::-1] + b'\n'
+        yield partial[::-1]
+
+    reverse = Track(reverse_lines, stream=True)
+    async with Spool('seq 100 120') | reverse as transport:
+        lines = await transport.readlines()
+    assert lines[0] == '001'
+    assert lines[-1] == '021'
+
+
+def _shout(chunk):
+    """Return `chunk` in upper case, slowly."""
+    time.sleep(0.001 * (chunk[-2] % 5))
+    return chunk.upper()
+
+
+async def test_thread_executor(feed):
+    """Run a blocking function in threads and keep the output in order."""
+    chunks = [b'chunk %d\n' % _ for _ in range(40)]
+    shout = Track(_shout, stream=True, executor='thread', max_in_flight=8)
+    output = b''
+    async with trio.open_nursery() as nursery:
+        shout.start(nursery)
+        nursery.start_soon(feed, shout, chunks)
+        while True:
+            chunk = await shout.receive_some()
+            if not chunk:
+                break
+            output += chunk
+    assert output == b''.join(chunks).upper()
+
+
+async def test_process_executor():
+    """Run a function in a process pool."""
+    shout = Track(_shout, stream=True, executor='process', max_in_flight=2)
+    async with Spool('seq -f line%g 1000') | shout as transport:
+        lines = await transport.readlines()
+    assert lines[-1] == 'LINE1000'
+
+
+async def test_wait_for_future():
+    """Wait for a pool without a thread and cancel what has not started."""
+    release = threading.Event()
+    with ThreadPoolExecutor(1) as pool:
+        busy = pool.submit(release.wait)
+        queued = pool.submit(str.upper, 'waiting')
+        with trio.move_on_after(0.1):
+            await wait_for_future(queued)
+        assert queued.cancelled()
+        release.set()
+        assert await wait_for_future(busy) is True
+        assert await wait_for_future(pool.submit(str.upper, 'ok')) == 'OK'